@@ -1,22 +1,43 @@
-from flask import Flask, jsonify, request, make_response, send_file
+from flask import Flask, jsonify, request, make_response, send_file, redirect, Response, stream_with_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from sqlalchemy import update, insert, select, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import selectinload, load_only
+from datetime import datetime, timedelta
 import os
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import Table, TableStyle, SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from io import BytesIO
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import hashlib
+import uuid
+import csv
+import io
+import threading
+import time
+import tempfile
+import zipfile
+import zlib
+import gzip
+import multiprocessing
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from dotenv import load_dotenv
+from cache import VersionedCache
+from pdf_store import create_artifact_store
+from mailer import SmtpSender, retry_delay
+from json_stream import iter_json_members, iter_ndjson
+from search_index import create_search_backend, default_search_backend, tokenize
+from pdf_render import render_invoice_pdf, render_print_notification_pdf, LARGE_ORDER_LINES
+from image_variants import IMAGE_VARIANTS, variants_available, image_version, fetch_image, render_image_variants
+try:
+    import zstandard
+except ImportError:  # Optional, zstd compressed exports are offered when installed
+    zstandard = None
+
 load_dotenv()  # Load environment variables from .env file
 
 app = Flask(__name__)
-CORS(app, expose_headers=['X-Filename', 'Content-Disposition'])
+CORS(app, expose_headers=['X-Filename', 'Content-Disposition', 'X-Next-Cursor'])
 
 # Configure SQLite database
 basedir = os.path.abspath(os.path.dirname(__file__))
@@ -27,10 +48,60 @@ db = SQLAlchemy(app)
 # Constants
 CURRENT_DB_VERSION = "1.1"  # Increment this when schema changes
 
+# Serialized catalog responses, invalidated on every catalog write
+catalog_cache = VersionedCache(max_entries=int(os.getenv('CATALOG_CACHE_SIZE', 256)))
+# Serialized print notification listings, invalidated when a notification is added
+notification_cache = VersionedCache(max_entries=16)
+# Single-row settings tables, loaded once per worker and refreshed on writes
+settings_cache = VersionedCache(max_entries=8)
+
+# Invoice PDFs are rendered on this pool when checkout runs asynchronously
+ASYNC_INVOICES = os.getenv('ASYNC_INVOICES', 'false').lower() == 'true'
+invoice_executor = ThreadPoolExecutor(max_workers=int(os.getenv('INVOICE_WORKERS', 2)))
+INVOICE_JOB_TIMEOUT = int(os.getenv('INVOICE_JOB_TIMEOUT', 300))
+
+# Full-text prop search: FTS5 on SQLite, a GIN tsvector index on Postgres,
+# otherwise an in-process inverted index kept in the catalog cache
+search_backend = create_search_backend(
+    os.getenv('SEARCH_BACKEND') or default_search_backend(make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name()),
+    cache=catalog_cache
+)
+
+# Bulk print notification PDF exports render missing PDFs on a process pool,
+# since ReportLab is CPU-bound and would serialize on the GIL in threads.
+# 0 renders them inline in the request instead
+PDF_RENDER_PROCESSES = int(os.getenv('PDF_RENDER_PROCESSES', os.cpu_count() or 1))
+# Process pools by name, each with the pid of the worker that created it
+process_pools = {}
+process_pools_lock = threading.Lock()
+
+# Rendered invoice and print notification PDFs, stored once and streamed on download
+pdf_store = create_artifact_store(
+    os.getenv('PDF_STORE_BACKEND', 'local'),
+    root=os.getenv('PDF_STORE_DIR', os.path.join(basedir, 'instance', 'pdf_store')),
+    max_bytes=int(os.getenv('PDF_STORE_MAX_BYTES', 256 * 1024 * 1024))
+)
+
+# Local copies of prop images and their resized variants. Images saved from
+# the admin panel are fetched on image_executor and resized on the 'image'
+# process pool
+IMAGE_INGEST = os.getenv('IMAGE_INGEST', 'true').lower() == 'true'
+IMAGE_PROCESSES = int(os.getenv('IMAGE_PROCESSES', 2))
+IMAGE_MAX_BYTES = int(os.getenv('IMAGE_MAX_BYTES', 10 * 1024 * 1024))
+# Hosts that may resolve to internal addresses, e.g. a local image server
+IMAGE_ALLOWED_HOSTS = {host.strip() for host in os.getenv('IMAGE_ALLOWED_HOSTS', '').split(',') if host.strip()}
+image_executor = ThreadPoolExecutor(max_workers=2)
+image_store = create_artifact_store(
+    os.getenv('IMAGE_STORE_BACKEND', 'local'),
+    root=os.getenv('IMAGE_STORE_DIR', os.path.join(basedir, 'instance', 'image_store')),
+    max_bytes=int(os.getenv('IMAGE_STORE_MAX_BYTES', 512 * 1024 * 1024)),
+    suffix='.img'
+)
+
 # Movie Prop Images Model
 class PropImage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    prop_id = db.Column(db.Integer, db.ForeignKey('movie_prop.id'), nullable=False)
+    prop_id = db.Column(db.Integer, db.ForeignKey('movie_prop.id'), nullable=False, index=True)
     image_url = db.Column(db.String(200), nullable=False)
     order = db.Column(db.Integer, default=0)  # To maintain image order
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -40,20 +111,148 @@ class MovieProp(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=False)
-    price = db.Column(db.Float, nullable=False)
+    price = db.Column(db.Float, nullable=False, index=True)
     print_cost = db.Column(db.Float, nullable=False, default=0.0)  # Default print cost is 0
-    category = db.Column(db.String(50), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    category = db.Column(db.String(50), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     images = db.relationship('PropImage', backref='prop', lazy=True, order_by='PropImage.order')
 
+# The search index follows movie_prop through create_all and drop_all
+@event.listens_for(MovieProp.__table__, 'after_create')
+def install_search_index(target, connection, **kw):
+    search_backend.install(connection)
+
+@event.listens_for(MovieProp.__table__, 'before_drop')
+def drop_search_index(target, connection, **kw):
+    search_backend.drop(connection)
+
 # Order Model
 class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     invoice_number = db.Column(db.String(20), unique=True, nullable=False)
-    order_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    order_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
     total_amount = db.Column(db.Float, nullable=False)
     customer_name = db.Column(db.String(100))
-    customer_email = db.Column(db.String(120))
+    customer_email = db.Column(db.String(120), index=True)
+    lines = db.relationship('OrderLine', backref='order', lazy=True, order_by='OrderLine.id')
+
+# Order Line Model
+# One row per cart line written at checkout. prop_id is not a foreign key so
+# deleting a prop keeps its sales history; name, category and order_date are
+# copied from the prop and order for reporting without joins
+class OrderLine(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False, index=True)
+    prop_id = db.Column(db.Integer, nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    unit_price = db.Column(db.Float, nullable=False)
+    unit_print_cost = db.Column(db.Float, nullable=False, default=0.0)
+    printed = db.Column(db.Boolean, nullable=False, default=False)
+    line_total = db.Column(db.Float, nullable=False)
+    order_date = db.Column(db.DateTime, nullable=False)
+    __table_args__ = (db.Index('ix_order_line_prop_id_order_date', 'prop_id', 'order_date'),)
+
+# Sales Rollup Models
+# Per-day aggregates maintained at checkout (see record_sales_rollups) so the
+# admin dashboard never has to scan order history
+class DailySales(db.Model):
+    day = db.Column(db.Date, primary_key=True)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)  # Order totals after discount
+    print_cost = db.Column(db.Float, nullable=False, default=0.0)
+
+class DailyPropSales(db.Model):
+    day = db.Column(db.Date, primary_key=True)
+    prop_id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)  # Line totals before discount
+    print_cost = db.Column(db.Float, nullable=False, default=0.0)
+
+class DailyCategorySales(db.Model):
+    day = db.Column(db.Date, primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)  # Line totals before discount
+    print_cost = db.Column(db.Float, nullable=False, default=0.0)
+
+# Invoice Job Model
+# Background invoice rendering jobs, shared by all workers through the database
+class InvoiceJob(db.Model):
+    id = db.Column(db.String(32), primary_key=True)
+    invoice_number = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, done or failed
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+
+# Stored PDF Model
+# Maps an invoice or print notification to its PDF in the artifact store
+class StoredPdf(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # invoice or print_notification
+    reference = db.Column(db.String(20), nullable=False)  # invoice number or notification id
+    digest = db.Column(db.String(64), nullable=False)
+    filename = db.Column(db.String(100), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (db.UniqueConstraint('kind', 'reference'),)
+
+# Image Variant Model
+# A locally stored copy of a prop image (variant 'original') or one of its
+# resized variants. image_url is the source it was made from, so rows left
+# behind by a changed image are never served for the new one
+class ImageVariant(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    image_id = db.Column(db.Integer, nullable=False)
+    variant = db.Column(db.String(20), nullable=False)
+    image_url = db.Column(db.String(200), nullable=False)
+    digest = db.Column(db.String(64), nullable=False)
+    content_type = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (db.UniqueConstraint('image_id', 'variant'),)
+
+# Category Model
+# Per-category prop count and price range, refreshed by every catalog write
+# so category listings never scan movie_prop
+class Category(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    prop_count = db.Column(db.Integer, nullable=False, default=0)
+    min_price = db.Column(db.Float, nullable=False)
+    max_price = db.Column(db.Float, nullable=False)
+
+# Cache Generation Model
+# One counter per cache, bumped in the same transaction as every write so
+# all worker processes can tell when their in-memory copies went stale
+class CacheGeneration(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+# Email Outbox Model
+# Emails written in the same transaction as the data they report on and
+# sent later by the outbox dispatcher
+class EmailOutbox(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True)  # pending, sending, sent or failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_by = db.Column(db.String(32), index=True)
+    claimed_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+# Invoice Sequence Model
+# Last invoice sequence number handed out per month (YYYYMM)
+class InvoiceSequence(db.Model):
+    year_month = db.Column(db.String(6), primary_key=True)
+    last_value = db.Column(db.Integer, nullable=False, default=0)
 
 # Database Schema Version Model
 class SchemaVersion(db.Model):
@@ -87,9 +286,10 @@ class PrintNotification(db.Model):
     invoice_number = db.Column(db.String(20), nullable=False)
     order_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     customer_name = db.Column(db.String(100), nullable=False)
-    customer_email = db.Column(db.String(120), nullable=False)
+    customer_email = db.Column(db.String(120), nullable=False, index=True)
     total_print_cost = db.Column(db.Float, nullable=False)
     order_details = db.Column(db.JSON, nullable=False)
+    __table_args__ = (db.Index('ix_print_notification_order_date_id', 'order_date', 'id'),)
 
 def get_current_schema_version():
     version = SchemaVersion.query.order_by(SchemaVersion.id.desc()).first()
@@ -100,6 +300,59 @@ def update_schema_version():
     db.session.add(new_version)
     db.session.commit()
 
+# Cross-worker cache coherence
+# gunicorn runs several worker processes, each with its own caches. Writers
+# bump the cache's generation row before committing; every request reads the
+# (tiny) generation table once and drops local caches whose generation moved.
+worker_caches = {
+    'catalog': catalog_cache,
+    'notifications': notification_cache,
+    'settings': settings_cache
+}
+
+def bump_cache_generation(name):
+    result = db.session.execute(
+        update(CacheGeneration)
+        .where(CacheGeneration.name == name)
+        .values(value=CacheGeneration.value + 1)
+    )
+    if result.rowcount == 0:
+        db.session.add(CacheGeneration(name=name, value=1))
+
+@app.before_request
+def sync_worker_caches():
+    try:
+        generations = dict(db.session.query(CacheGeneration.name, CacheGeneration.value).all())
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error reading cache generations: {str(e)}")
+        return
+    for name, cache in worker_caches.items():
+        cache.sync(generations.get(name, 0))
+
+def ensure_schema():
+    # Create tables and indexes that were added after the database was first
+    # set up (create_all skips existing tables, so their new indexes are
+    # created individually)
+    with app.app_context():
+        os.makedirs(os.path.join(basedir, 'instance'), exist_ok=True)
+        try:
+            db.create_all()
+            for table in db.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(db.engine, checkfirst=True)
+            with db.engine.begin() as connection:
+                search_backend.install(connection)
+            # Fill the category table once for catalogs created before it
+            if not Category.query.first() and MovieProp.query.first():
+                refresh_categories()
+                db.session.commit()
+        except Exception as e:
+            print(f"Error ensuring database schema: {str(e)}")
+        finally:
+            # Don't hand pooled connections from the preloading master to forked workers
+            db.engine.dispose()
+
 def initialize_database():
     with app.app_context():
         # Drop all tables and recreate them
@@ -124,210 +377,670 @@ def initialize_database():
         if not MovieProp.query.first():
             seed_sample_data()
 
-def send_print_notification(order_details, customer_details):
-    try:
-        # Calculate total print cost
-        total_print_cost = sum(
-            item.get('print_cost', 0) * item.get('quantity', 1)
-            for item in order_details.get('items', [])
-            if item.get('printedVersion')
-        )
-        
-        # Create new print notification
-        notification = PrintNotification(
-            invoice_number=order_details.get('invoiceNumber', 'N/A'),
-            order_date=datetime.now(),
-            customer_name=customer_details['name'],
-            customer_email=customer_details['email'],
-            total_print_cost=total_print_cost,
-            order_details=order_details
+def add_print_notification(order_details, customer_details, total_print_cost):
+    # Adds the notification (and its email) to the checkout's unit of work,
+    # the caller commits
+    notification = PrintNotification(
+        invoice_number=order_details.get('invoiceNumber', 'N/A'),
+        order_date=datetime.now(),
+        customer_name=customer_details['name'],
+        customer_email=customer_details['email'],
+        total_print_cost=total_print_cost,
+        order_details=order_details
+    )
+    db.session.add(notification)
+
+    # The email is sent by the outbox dispatcher instead of during checkout
+    email_settings = get_email_settings()
+    if email_settings and email_settings['smtp_server']:
+        db.session.add(EmailOutbox(
+            recipient=email_settings['notification_email'],
+            subject=f"New print order {notification.invoice_number}",
+            body=print_notification_email_body(notification)
+        ))
+    bump_cache_generation('notifications')
+    return notification
+
+def print_notification_email_body(notification):
+    lines = [
+        f"New print order {notification.invoice_number}",
+        "",
+        f"Customer: {notification.customer_name} <{notification.customer_email}>",
+        f"Order Date: {notification.order_date.strftime('%Y-%m-%d %H:%M:%S')}",
+        "",
+        "Printed items:"
+    ]
+    for item in notification.order_details.get('items', []):
+        if item.get('printedVersion'):
+            lines.append(f"- {item.get('name', '')} x {item.get('quantity', 1)} (print cost ${item.get('print_cost', 0):,.2f} each)")
+    lines.append("")
+    lines.append(f"Total print cost: ${notification.total_print_cost:,.2f}")
+    return "\n".join(lines)
+
+# Email outbox dispatcher
+# Every worker runs one background thread that drains email_outbox over a
+# reused SMTP connection. Messages are claimed with a per-batch token so two
+# workers never send the same message; failed sends are retried with
+# exponential backoff and given up after OUTBOX_MAX_ATTEMPTS.
+EMAIL_DISPATCHER = os.getenv('EMAIL_DISPATCHER', 'true').lower() == 'true'
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 20))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 8))
+OUTBOX_POLL_SECONDS = float(os.getenv('OUTBOX_POLL_SECONDS', 30))
+OUTBOX_CLAIM_TIMEOUT = timedelta(minutes=10)  # Reclaim messages of a dispatcher that died mid-send
+outbox_wakeup = threading.Event()
+outbox_sender = SmtpSender(sender=os.getenv('MAIL_FROM') or None)
+outbox_dispatcher_lock = threading.Lock()
+outbox_dispatcher_pid = None
+
+def claim_outbox_messages():
+    now = datetime.utcnow()
+    due = db.session.query(EmailOutbox.id).filter(
+        db.or_(
+            db.and_(EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now),
+            db.and_(EmailOutbox.status == 'sending', EmailOutbox.claimed_at < now - OUTBOX_CLAIM_TIMEOUT)
         )
-        
-        # Save to database
-        db.session.add(notification)
-        db.session.commit()
-        
-        # Try to send email if configured
-        email_settings = EmailSettings.query.first()
-        if email_settings and email_settings.smtp_server:
+    ).order_by(EmailOutbox.id).limit(OUTBOX_BATCH_SIZE).all()
+    if not due:
+        return []
+
+    # Only rows still unclaimed when the UPDATE runs get this batch's token
+    token = uuid.uuid4().hex
+    db.session.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_([row.id for row in due]))
+        .where(db.or_(EmailOutbox.status == 'pending', EmailOutbox.claimed_at < now - OUTBOX_CLAIM_TIMEOUT))
+        .values(status='sending', claimed_by=token, claimed_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return EmailOutbox.query.filter_by(claimed_by=token, status='sending').order_by(EmailOutbox.id).all()
+
+def dispatch_outbox():
+    # Sends one batch and returns the number of messages claimed
+    messages = claim_outbox_messages()
+    if not messages:
+        return 0
+
+    email_settings = get_email_settings()
+    for message in messages:
+        try:
+            if not email_settings or not email_settings['smtp_server']:
+                raise RuntimeError('Email settings not configured')
+            outbox_sender.send(email_settings, message.recipient, message.subject, message.body)
+            message.status = 'sent'
+            message.sent_at = datetime.utcnow()
+        except Exception as e:
+            print(f"Failed to send email {message.id}: {str(e)}")
+            outbox_sender.close()
+            message.attempts += 1
+            message.last_error = str(e)
+            if message.attempts >= OUTBOX_MAX_ATTEMPTS:
+                message.status = 'failed'
+            else:
+                message.status = 'pending'
+                message.next_attempt_at = datetime.utcnow() + timedelta(seconds=retry_delay(message.attempts))
+    db.session.commit()
+    return len(messages)
+
+def run_outbox_dispatcher():
+    while True:
+        outbox_wakeup.wait(OUTBOX_POLL_SECONDS)
+        outbox_wakeup.clear()
+        with app.app_context():
             try:
-                send_email_notification(notification, email_settings)
+                sync_worker_caches()
+                while dispatch_outbox() == OUTBOX_BATCH_SIZE:
+                    pass
             except Exception as e:
-                print(f"Failed to send email: {str(e)}")
-                # Continue even if email fails
-                pass
-                
-        return True
-    except Exception as e:
-        print(f"Error in send_print_notification: {str(e)}")
-        return False
+                db.session.rollback()
+                print(f"Error dispatching email outbox: {str(e)}")
+
+@app.before_request
+def start_outbox_dispatcher():
+    # Started lazily so every (forked) gunicorn worker gets its own thread
+    global outbox_dispatcher_pid
+    if not EMAIL_DISPATCHER or outbox_dispatcher_pid == os.getpid():
+        return
+    with outbox_dispatcher_lock:
+        if outbox_dispatcher_pid == os.getpid():
+            return
+        outbox_dispatcher_pid = os.getpid()
+        threading.Thread(target=run_outbox_dispatcher, name='outbox-dispatcher', daemon=True).start()
+
+# Invoice number allocation
+# Each month has a counter row in invoice_sequence that is advanced with an
+# atomic UPDATE in its own short transaction, so concurrent checkouts in
+# different workers never compute the same number and no scan of the order
+# table is needed. With INVOICE_NUMBER_BLOCK > 1 a worker reserves a block
+# of numbers at once and hands them out from memory (numbers then increase
+# per worker, and unused numbers of a block are skipped on restart).
+INVOICE_NUMBER_BLOCK = int(os.getenv('INVOICE_NUMBER_BLOCK', 1))
+invoice_number_blocks = {}  # year_month -> (next sequence, last reserved sequence)
+invoice_number_lock = threading.Lock()
+
+def latest_invoice_sequence(connection, year_month):
+    # Only used once per month to continue after numbers issued before the
+    # counter row existed
+    latest = connection.execute(
+        select(Order.invoice_number)
+        .where(Order.invoice_number.like(f"{year_month}-%"))
+        .order_by(Order.id.desc())
+        .limit(1)
+    ).scalar()
+    return int(latest[-4:]) if latest else 0
+
+def reserve_invoice_numbers(year_month, count):
+    # Returns the last sequence number of the reserved block
+    sequence_table = InvoiceSequence.__table__
+    for attempt in range(3):
+        try:
+            with db.engine.begin() as connection:
+                result = connection.execute(
+                    update(sequence_table)
+                    .where(sequence_table.c.year_month == year_month)
+                    .values(last_value=sequence_table.c.last_value + count)
+                )
+                if result.rowcount:
+                    return connection.execute(
+                        select(sequence_table.c.last_value)
+                        .where(sequence_table.c.year_month == year_month)
+                    ).scalar()
+
+                # First invoice of the month
+                last_value = latest_invoice_sequence(connection, year_month) + count
+                connection.execute(insert(sequence_table).values(year_month=year_month, last_value=last_value))
+                return last_value
+        except IntegrityError:
+            # Another worker created the month's row first, update it instead
+            continue
+    raise RuntimeError(f"Could not allocate an invoice number for {year_month}")
 
 def generate_invoice_number():
     # Get current year and month
     now = datetime.now()
     year_month = now.strftime('%Y%m')
-    
-    # Get the latest order with an invoice number starting with the current year/month
-    latest_order = Order.query.filter(
-        Order.invoice_number.like(f"{year_month}-%")
-    ).order_by(Order.id.desc()).first()
-    
-    if latest_order and latest_order.invoice_number:
-        # Extract the sequence number from the latest invoice
-        sequence = int(latest_order.invoice_number[-4:]) + 1
-    else:
-        # Start new sequence for new year/month
-        sequence = 1
-    
+
+    with invoice_number_lock:
+        sequence, last = invoice_number_blocks.get(year_month, (1, 0))
+        if sequence > last:
+            last = reserve_invoice_numbers(year_month, INVOICE_NUMBER_BLOCK)
+            sequence = last - INVOICE_NUMBER_BLOCK + 1
+        invoice_number_blocks[year_month] = (sequence + 1, last)
+
     # Format: YYYYMM-XXXX (e.g., 202412-0001)
     return f"{year_month}-{sequence:04d}"
 
+# Pre-serialized JSON responses
+# Read endpoints keep the encoded JSON bytes together with a strong ETag
+# derived from them, so unchanged reads skip serialization and a matching
+# If-None-Match is answered with 304 Not Modified.
+def json_payload(data):
+    body = app.json.dumps(data).encode('utf-8')
+    return body, hashlib.sha256(body).hexdigest()[:32]
+
+def json_payload_response(payload, cache_control='public, no-cache'):
+    body, etag = payload
+    response = make_response(body)
+    response.headers['Content-Type'] = 'application/json'
+    response.headers['Cache-Control'] = cache_control
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+# Print notification listing
+# Newest first with keyset pagination on (order_date, id), backed by the
+# composite index. The cursor is "<order_date ISO>_<id>" of the last row of
+# the previous page. Without limit the full list is returned as before.
+MAX_NOTIFICATION_PAGE_SIZE = 500
+NOTIFICATION_EXPORT_BATCH_SIZE = 500
+NOTIFICATION_FIELDS = ('id', 'invoice_number', 'order_date', 'customer_name', 'customer_email', 'total_print_cost')
+
+def parse_notification_cursor(value):
+    order_date, _, notification_id = value.rpartition('_')
+    return datetime.fromisoformat(order_date), int(notification_id)
+
+def notification_cursor(notification):
+    return f"{notification.order_date.isoformat()}_{notification.id}"
+
+def print_notification_query(start=None, end=None, customer_email=None, after=None, ids=None):
+    query = PrintNotification.query
+    if ids:
+        query = query.filter(PrintNotification.id.in_(ids))
+    if customer_email:
+        query = query.filter(PrintNotification.customer_email == customer_email)
+    if start:
+        query = query.filter(PrintNotification.order_date >= start)
+    if end:
+        query = query.filter(PrintNotification.order_date < end)
+    if after:
+        order_date, notification_id = after
+        query = query.filter(db.or_(
+            PrintNotification.order_date < order_date,
+            db.and_(PrintNotification.order_date == order_date, PrintNotification.id < notification_id)
+        ))
+    return query.order_by(PrintNotification.order_date.desc(), PrintNotification.id.desc())
+
+def serialize_print_notification(notification):
+    return {
+        'id': notification.id,
+        'invoice_number': notification.invoice_number,
+        'order_date': notification.order_date.isoformat(),
+        'customer_name': notification.customer_name,
+        'customer_email': notification.customer_email,
+        'total_print_cost': notification.total_print_cost
+    }
+
+def parse_notification_filters():
+    # Raises ValueError for malformed dates or cursors
+    start, end = parse_date_range()
+    cursor = request.args.get('cursor')
+    return {
+        'start': start,
+        'end': end,
+        'customer_email': request.args.get('customer_email'),
+        'after': parse_notification_cursor(cursor) if cursor else None
+    }
+
 @app.route('/api/print-notifications', methods=['GET'])
 def get_print_notifications():
     try:
-        notifications = PrintNotification.query.order_by(PrintNotification.order_date.desc()).all()
-        return jsonify([{
-            'id': n.id,
-            'invoice_number': n.invoice_number,
-            'order_date': n.order_date.isoformat(),
-            'customer_name': n.customer_name,
-            'customer_email': n.customer_email,
-            'total_print_cost': n.total_print_cost
-        } for n in notifications])
+        try:
+            filters = parse_notification_filters()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            limit = max(1, min(limit, MAX_NOTIFICATION_PAGE_SIZE))
+
+        cache_key = ('list', limit, *filters.values())
+        cached = notification_cache.get(cache_key)
+        if cached is None:
+            version = notification_cache.version
+            query = print_notification_query(**filters).options(load_only(*[
+                getattr(PrintNotification, field) for field in NOTIFICATION_FIELDS if field != 'id'
+            ]))
+            next_cursor = None
+            if limit is not None:
+                notifications = query.limit(limit + 1).all()
+                if len(notifications) > limit:
+                    notifications = notifications[:limit]
+                    next_cursor = notification_cursor(notifications[-1])
+            else:
+                notifications = query.all()
+            cached = (json_payload([serialize_print_notification(n) for n in notifications]), next_cursor)
+            notification_cache.set(cache_key, cached, version)
+
+        payload, next_cursor = cached
+        response = json_payload_response(payload, 'private, no-cache')
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def generate_print_notification_pdf(notification):
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-    elements = []
-
-    # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        spaceAfter=10
-    )
-    elements.append(Paragraph("Print Order Notification", title_style))
-    elements.append(Paragraph(f"Invoice #: {notification.invoice_number}", styles['Normal']))
-    elements.append(Spacer(1, 20))
-
-    # Customer Details
-    customer_style = ParagraphStyle(
-        'CustomerInfo',
-        parent=styles['Normal'],
-        fontSize=12,
-        spaceAfter=20
-    )
-    customer_info = f"""
-    <b>Customer Details:</b><br/>
-    Name: {notification.customer_name}<br/>
-    Email: {notification.customer_email}<br/>
-    Order Date: {notification.order_date.strftime('%Y-%m-%d %H:%M:%S')}
-    """
-    elements.append(Paragraph(customer_info, customer_style))
-    elements.append(Spacer(1, 20))
-
-    # Order Details Table
-    table_data = [['Item', 'Quantity', 'Price', 'Print Cost']]
-    order_details = notification.order_details
-    if isinstance(order_details, str):
-        import json
-        order_details = json.loads(order_details)
-    
-    for item in order_details.get('items', []):
-        if item.get('printedVersion'):
-            table_data.append([
-                item['name'],
-                str(item['quantity']),
-                f"${item.get('price', 0):,.2f}",
-                f"${item.get('print_cost', 0):,.2f}"
-            ])
-
-    table = Table(table_data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 14),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    elements.append(table)
-    elements.append(Spacer(1, 20))
-
-    # Total
-    total_style = ParagraphStyle(
-        'Total',
-        parent=styles['Normal'],
-        fontSize=14,
-        spaceAfter=20,
-        alignment=2  # Right alignment
-    )
-    elements.append(Paragraph(f"<b>Total Print Cost: ${notification.total_print_cost}</b>", total_style))
+@app.route('/api/print-notifications/export', methods=['GET'])
+def export_print_notifications():
+    # Streams all matching notifications as NDJSON (with order details) or
+    # CSV, reading them in keyset batches so memory stays bounded
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'error': 'Unsupported format, use ndjson or csv'}), 400
+    try:
+        filters = parse_notification_filters()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
+    def batches():
+        after = filters['after']
+        while True:
+            notifications = print_notification_query(**{**filters, 'after': after}).limit(NOTIFICATION_EXPORT_BATCH_SIZE).all()
+            if not notifications:
+                return
+            yield notifications
+            after = (notifications[-1].order_date, notifications[-1].id)
+            db.session.expunge_all()
+
+    def ndjson():
+        for notifications in batches():
+            yield ''.join(
+                app.json.dumps({**serialize_print_notification(n), 'order_details': n.order_details}) + '\n'
+                for n in notifications
+            )
+
+    def csv_rows():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(NOTIFICATION_FIELDS)
+        for notifications in batches():
+            for n in notifications:
+                writer.writerow(serialize_print_notification(n).values())
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    if export_format == 'csv':
+        response = Response(stream_with_context(csv_rows()), mimetype='text/csv')
+    else:
+        response = Response(stream_with_context(ndjson()), mimetype='application/x-ndjson')
+    response.headers['Content-Disposition'] = f'attachment; filename="print_notifications.{export_format}"'
+    return response
 
 @app.route('/api/print-notifications/<int:notification_id>/pdf', methods=['GET'])
 def get_print_notification_pdf(notification_id):
     try:
-        notification = PrintNotification.query.get_or_404(notification_id)
-        buffer = generate_print_notification_pdf(notification)
+        # Serve the stored PDF when it was rendered before and is still in the store
+        response = send_stored_pdf('print_notification', str(notification_id))
+        if response:
+            return response
 
-        response = make_response(buffer.getvalue())
-        response.headers['Content-Type'] = 'application/pdf'
+        notification = PrintNotification.query.get_or_404(notification_id)
+        pdf = render_print_notification_pdf(notification)
         filename = f"print_notification_{notification.invoice_number}.pdf"
-        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
-        return response
+        store_pdf('print_notification', str(notification.id), pdf, filename)
+        db.session.commit()
+        return pdf_response(pdf, filename)
 
     except Exception as e:
         print(f"Error generating PDF: {str(e)}")  # Add logging for debugging
         return jsonify({'error': str(e)}), 500
 
+# Bulk print notification PDF export
+# Notifications are read in keyset batches. PDFs already in the artifact store
+# are copied into the archive from disk, the missing ones of each batch are
+# rendered in parallel on the process pool and stored for later downloads.
+# The archive is yielded entry by entry, so memory holds at most one batch of
+# rendered PDFs.
+PDF_ZIP_BATCH_SIZE = int(os.getenv('PDF_ZIP_BATCH_SIZE', 32))
+MAX_PDF_ZIP_IDS = 1000
+
+class ZipStreamBuffer:
+    # Unseekable write target for ZipFile; drain() returns everything written
+    # since the previous call
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def get_process_pool(name, max_workers):
+    # Created lazily in every (forked) worker. Children are spawned rather
+    # than forked, so they don't inherit the app's threads and connections
+    with process_pools_lock:
+        pid, pool = process_pools.get(name, (None, None))
+        if pid != os.getpid():
+            pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+            process_pools[name] = (os.getpid(), pool)
+        return pool
+
+def render_print_notification_pdfs(notifications):
+    # Renders on the process pool from plain copies of the rendered fields,
+    # model instances can't be sent to other processes
+    snapshots = [SimpleNamespace(
+        invoice_number=n.invoice_number,
+        customer_name=n.customer_name,
+        customer_email=n.customer_email,
+        order_date=n.order_date,
+        order_details=n.order_details,
+        total_print_cost=n.total_print_cost
+    ) for n in notifications]
+    if PDF_RENDER_PROCESSES <= 0 or len(snapshots) == 1:
+        return [render_print_notification_pdf(snapshot) for snapshot in snapshots]
+    return list(get_process_pool('pdf', PDF_RENDER_PROCESSES).map(render_print_notification_pdf, snapshots))
+
+@app.route('/api/print-notifications/pdfs', methods=['GET'])
+def export_print_notification_pdfs():
+    # ZIP archive with the PDFs of the given ids=1,2,3 or of all
+    # notifications in a start/end date range (optionally customer_email)
+    try:
+        filters = parse_notification_filters()
+        ids = [int(value) for value in request.args.get('ids', '').split(',') if value.strip()]
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not ids and not (filters['start'] or filters['end']):
+        return jsonify({'error': 'Pass ids or a start/end date range'}), 400
+    if len(ids) > MAX_PDF_ZIP_IDS:
+        return jsonify({'error': f'At most {MAX_PDF_ZIP_IDS} ids per archive'}), 400
+
+    def archive():
+        buffer = ZipStreamBuffer()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+            after = filters['after']
+            while True:
+                notifications = print_notification_query(**{**filters, 'after': after}, ids=ids).limit(PDF_ZIP_BATCH_SIZE).all()
+                if not notifications:
+                    break
+                after = (notifications[-1].order_date, notifications[-1].id)
+
+                records = {
+                    record.reference: record
+                    for record in StoredPdf.query.filter(
+                        StoredPdf.kind == 'print_notification',
+                        StoredPdf.reference.in_([str(n.id) for n in notifications])
+                    )
+                }
+                streams = {}
+                for n in notifications:
+                    record = records.get(str(n.id))
+                    stream = pdf_store.open(record.digest) if record else None
+                    if stream is not None:
+                        streams[n.id] = stream
+                missing = [n for n in notifications if n.id not in streams]
+                rendered = dict(zip([n.id for n in missing], render_print_notification_pdfs(missing)))
+
+                for n in notifications:
+                    if n.id in streams:
+                        with streams.pop(n.id) as stream, zf.open(records[str(n.id)].filename, 'w') as entry:
+                            for chunk in iter(lambda: stream.read(64 * 1024), b''):
+                                entry.write(chunk)
+                                yield buffer.drain()
+                    else:
+                        filename = f"print_notification_{n.invoice_number}.pdf"
+                        pdf = rendered.pop(n.id)
+                        store_pdf('print_notification', str(n.id), pdf, filename)
+                        zf.writestr(filename, pdf)
+                    yield buffer.drain()
+
+                if missing:
+                    db.session.commit()
+                db.session.expunge_all()
+        yield buffer.drain()
+
+    response = Response(stream_with_context(chunk for chunk in archive() if chunk), mimetype='application/zip')
+    response.headers['Content-Disposition'] = 'attachment; filename="print_notifications.zip"'
+    return response
+
+# Catalog query layer
+# Props are loaded together with their images in a fixed number of queries
+# (one for the props, one for all of their images) instead of one extra
+# SELECT per prop through the lazy relationship.
+PROP_FIELDS = ('id', 'name', 'description', 'price', 'print_cost', 'category', 'created_at', 'images')
+MAX_PAGE_SIZE = 200
+
+def catalog_query(fields=PROP_FIELDS):
+    query = MovieProp.query
+    if 'images' in fields:
+        query = query.options(selectinload(MovieProp.images))
+    # Only load the requested columns (the primary key is always loaded)
+    columns = [getattr(MovieProp, field) for field in fields if field not in ('id', 'images')]
+    if columns and len(columns) < len(PROP_FIELDS) - 2:
+        query = query.options(load_only(*columns))
+    return query.order_by(MovieProp.id)
+
+def get_catalog_prop(prop_id):
+    return catalog_query().filter(MovieProp.id == prop_id).first_or_404()
+
+def parse_prop_fields(value):
+    # Parse a comma separated fields= projection, the id is always included
+    if not value:
+        return PROP_FIELDS
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in PROP_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return tuple(field for field in PROP_FIELDS if field == 'id' or field in fields)
+
+def serialize_prop(prop, fields=PROP_FIELDS):
+    data = {}
+    for field in fields:
+        if field == 'images':
+            data['images'] = [{
+                'id': img.id,
+                'image_url': img.image_url,
+                'order': img.order,
+                'version': image_version(img.image_url)
+            } for img in prop.images]
+        elif field == 'created_at':
+            data['created_at'] = prop.created_at.isoformat()
+        else:
+            data[field] = getattr(prop, field)
+    return data
+
 @app.route('/api/props', methods=['GET'])
 def get_props():
-    props = MovieProp.query.all()
-    return jsonify([{
-        'id': prop.id,
-        'name': prop.name,
-        'description': prop.description,
-        'price': prop.price,
-        'print_cost': prop.print_cost,
-        'category': prop.category,
-        'created_at': prop.created_at.isoformat(),
-        'images': [{
-            'id': img.id,
-            'image_url': img.image_url,
-            'order': img.order
-        } for img in prop.images]
-    } for prop in props])
+    try:
+        fields = parse_prop_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor', type=int)
+    category = request.args.get('category')
+    min_price = request.args.get('min_price', type=float)
+    max_price = request.args.get('max_price', type=float)
+
+    cache_key = ('props', fields, limit, cursor, category, min_price, max_price)
+    cached = catalog_cache.get(cache_key)
+    if cached is None:
+        version = catalog_cache.version
+
+        # Filters are pushed into SQL (backed by the indexes on category and price)
+        query = catalog_query(fields)
+        if category:
+            query = query.filter(MovieProp.category == category)
+        if min_price is not None:
+            query = query.filter(MovieProp.price >= min_price)
+        if max_price is not None:
+            query = query.filter(MovieProp.price <= max_price)
+
+        # Keyset pagination on id: the cursor is the last id of the previous page
+        if cursor is not None:
+            query = query.filter(MovieProp.id > cursor)
+        next_cursor = None
+        if limit is not None:
+            limit = max(1, min(limit, MAX_PAGE_SIZE))
+            props = query.limit(limit + 1).all()
+            if len(props) > limit:
+                props = props[:limit]
+                next_cursor = props[-1].id
+        else:
+            props = query.all()
+
+        cached = (json_payload([serialize_prop(prop, fields) for prop in props]), next_cursor)
+        catalog_cache.set(cache_key, cached, version)
+
+    payload, next_cursor = cached
+    response = json_payload_response(payload)
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+    return response
 
 @app.route('/api/props/<int:prop_id>', methods=['GET'])
 def get_prop(prop_id):
-    prop = MovieProp.query.get_or_404(prop_id)
-    return jsonify({
-        'id': prop.id,
-        'name': prop.name,
-        'description': prop.description,
-        'price': prop.price,
-        'print_cost': prop.print_cost,
-        'category': prop.category,
-        'created_at': prop.created_at.isoformat(),
-        'images': [{
-            'id': img.id,
-            'image_url': img.image_url,
-            'order': img.order
-        } for img in prop.images]
-    })
+    cache_key = ('prop', prop_id)
+    payload = catalog_cache.get(cache_key)
+    if payload is None:
+        version = catalog_cache.version
+        payload = json_payload(serialize_prop(get_catalog_prop(prop_id)))
+        catalog_cache.set(cache_key, payload, version)
+    return json_payload_response(payload)
+
+# Category facets
+# The category table holds the prop count and price range of every
+# category. Writers call refresh_categories() with the categories they
+# touched, which recomputes just those rows from movie_prop through the
+# category index in the write's transaction.
+def refresh_categories(names=None):
+    # Refreshes the given category names, or every category when None
+    props = MovieProp.__table__
+    categories = Category.__table__
+    db.session.flush()
+    query = select(
+        props.c.category, db.func.count(), db.func.min(props.c.price), db.func.max(props.c.price)
+    ).group_by(props.c.category)
+    if names is None:
+        db.session.execute(categories.delete())
+    else:
+        names = set(names)
+        if not names:
+            return
+        query = query.where(props.c.category.in_(names))
+        db.session.execute(categories.delete().where(categories.c.name.in_(names)))
+    rows = [{'name': name, 'prop_count': count, 'min_price': min_price, 'max_price': max_price}
+            for name, count, min_price, max_price in db.session.execute(query)]
+    if rows:
+        db.session.execute(insert(categories), rows)
+
+@app.route('/api/categories', methods=['GET'])
+def get_categories():
+    payload = catalog_cache.get('categories')
+    if payload is None:
+        version = catalog_cache.version
+        payload = json_payload([{
+            'name': category.name,
+            'count': category.prop_count,
+            'min_price': category.min_price,
+            'max_price': category.max_price
+        } for category in Category.query.order_by(Category.name)])
+        catalog_cache.set('categories', payload, version)
+    return json_payload_response(payload)
+
+# Full-text search
+# Ranked matches for every word of q (as prefixes), optionally within a
+# category, plus match counts per category over all matches. Results are
+# cached with the other catalog responses.
+MAX_SEARCH_PAGE_SIZE = 100
+
+@app.route('/api/props/search', methods=['GET'])
+def search_props():
+    terms = tokenize(request.args.get('q', ''))
+    if not terms:
+        return jsonify({'error': 'Missing search query'}), 400
+    try:
+        fields = parse_prop_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    category = request.args.get('category') or None
+    limit = max(1, min(request.args.get('limit', 20, type=int), MAX_SEARCH_PAGE_SIZE))
+    offset = max(0, request.args.get('offset', 0, type=int))
+
+    cache_key = ('search', tuple(terms), category, limit, offset, fields)
+    payload = catalog_cache.get(cache_key)
+    if payload is None:
+        version = catalog_cache.version
+        ids, total, facets = search_backend.search(db.session.connection(), terms, category, limit, offset)
+        props = {prop.id: prop for prop in catalog_query(fields).filter(MovieProp.id.in_(ids))} if ids else {}
+        payload = json_payload({
+            'results': [serialize_prop(props[prop_id], fields) for prop_id in ids if prop_id in props],
+            'total': total,
+            'facets': [
+                {'category': name, 'count': count}
+                for name, count in sorted(facets.items(), key=lambda facet: (-facet[1], facet[0]))
+            ]
+        })
+        catalog_cache.set(cache_key, payload, version)
+    return json_payload_response(payload)
+
+@app.route('/api/admin/catalog-cache', methods=['GET'])
+def get_catalog_cache_stats():
+    return jsonify(catalog_cache.stats())
 
 @app.route('/api/props', methods=['POST'])
 def create_prop():
@@ -353,21 +1066,11 @@ def create_prop():
         )
         db.session.add(prop_image)
 
+    refresh_categories([new_prop.category])
+    bump_cache_generation('catalog')
     db.session.commit()
-    return jsonify({
-        'id': new_prop.id,
-        'name': new_prop.name,
-        'description': new_prop.description,
-        'price': new_prop.price,
-        'print_cost': new_prop.print_cost,
-        'category': new_prop.category,
-        'created_at': new_prop.created_at.isoformat(),
-        'images': [{
-            'id': img.id,
-            'image_url': img.image_url,
-            'order': img.order
-        } for img in new_prop.images]
-    }), 201
+    catalog_cache.invalidate()
+    return jsonify(serialize_prop(new_prop)), 201
 
 # Admin Routes
 @app.route('/api/admin/props', methods=['POST'])
@@ -397,66 +1100,145 @@ def create_admin_prop():
             )
             db.session.add(prop_image)
 
+    refresh_categories([new_prop.category])
+    bump_cache_generation('catalog')
     db.session.commit()
-    return jsonify({
-        'id': new_prop.id,
-        'name': new_prop.name,
-        'description': new_prop.description,
-        'price': new_prop.price,
-        'print_cost': new_prop.print_cost,
-        'category': new_prop.category,
-        'created_at': new_prop.created_at.isoformat(),
-        'images': [{
-            'id': img.id,
-            'image_url': img.image_url,
-            'order': img.order
-        } for img in new_prop.images]
-    })
+    catalog_cache.invalidate()
+    schedule_image_ingest([image.id for image in new_prop.images])
+    return jsonify(serialize_prop(new_prop))
+
+def edited_image_urls(images_data):
+    # (order, url) pairs of an admin images payload; raises ValueError for
+    # entries that are neither URLs nor objects with an image_url
+    if not isinstance(images_data, list):
+        raise ValueError('images must be a list')
+    urls = []
+    for i, image_data in enumerate(images_data):
+        if i >= 5:  # Limit to 5 images
+            break
+        # Handle both string URLs and objects with image_url
+        if isinstance(image_data, dict):
+            image_data = image_data.get('image_url')
+        if image_data is not None and not isinstance(image_data, str):
+            raise ValueError(f'Invalid image at position {i}')
+        if image_data:
+            urls.append((i, image_data))
+    return urls
+
+def apply_prop_edit(prop, data):
+    # Applies an admin edit to prop and returns whether anything changed.
+    # Images are diffed against the existing rows: kept URLs are reordered
+    # in place, only new URLs are inserted and only removed ones deleted.
+    # Raises ValueError (or TypeError) for invalid values
+    if not isinstance(data, dict):
+        raise ValueError('Invalid data format')
+    changed = False
+    values = {
+        'name': data.get('name', prop.name),
+        'description': data.get('description', prop.description),
+        'price': float(data.get('price', prop.price)),
+        'print_cost': float(data.get('print_cost', prop.print_cost)),
+        'category': data.get('category', prop.category)
+    }
+    for field, value in values.items():
+        if getattr(prop, field) != value:
+            setattr(prop, field, value)
+            changed = True
+
+    if 'images' in data:
+        existing = {}
+        for image in sorted(prop.images, key=lambda image: (image.order, image.id)):
+            existing.setdefault(image.image_url, []).append(image)
+        for order, image_url in edited_image_urls(data['images']):
+            if existing.get(image_url):
+                image = existing[image_url].pop(0)
+                if image.order != order:
+                    image.order = order
+                    changed = True
+            else:
+                prop.images.append(PropImage(image_url=image_url, order=order))
+                changed = True
+        for images in existing.values():
+            for image in images:
+                prop.images.remove(image)
+                db.session.delete(image)
+                changed = True
+    return changed
 
 @app.route('/api/admin/props/<int:prop_id>', methods=['PUT'])
 def update_admin_prop(prop_id):
-    prop = MovieProp.query.get_or_404(prop_id)
+    prop = MovieProp.query.options(selectinload(MovieProp.images)).filter_by(id=prop_id).first_or_404()
     data = request.json
-    
-    prop.name = data.get('name', prop.name)
-    prop.description = data.get('description', prop.description)
-    prop.price = float(data.get('price', prop.price))
-    prop.print_cost = float(data.get('print_cost', prop.print_cost))
-    prop.category = data.get('category', prop.category)
-    
-    # Update images
-    if 'images' in data:
-        # Remove existing images
-        PropImage.query.filter_by(prop_id=prop.id).delete()
-        
-        # Add new images
-        for i, image_data in enumerate(data['images']):
-            if i >= 5:  # Limit to 5 images
-                break
-            # Handle both string URLs and objects with image_url
-            image_url = image_data if isinstance(image_data, str) else image_data.get('image_url')
-            if image_url and isinstance(image_url, str):
-                prop_image = PropImage(
-                    prop_id=prop.id,
-                    image_url=image_url,
-                    order=i
-                )
-                db.session.add(prop_image)
-    
-    db.session.commit()
+    old_category = prop.category
+
+    try:
+        changed = apply_prop_edit(prop, data)
+    except (TypeError, ValueError) as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
+    # Saving an unchanged prop writes nothing and keeps the caches
+    if changed:
+        refresh_categories([old_category, prop.category])
+        if 'images' in data:
+            delete_orphan_image_variants()
+        bump_cache_generation('catalog')
+        db.session.commit()
+        catalog_cache.invalidate()
+    schedule_image_ingest([image.id for image in prop.images])
+    return jsonify(serialize_prop(prop))
+
+# Bulk admin edits
+# {"props": [{"id": ..., <fields as for PUT>}, ...]} applied in one
+# transaction; an unknown id or invalid value rejects the whole batch
+MAX_BULK_EDITS = 500
+
+@app.route('/api/admin/props/bulk', methods=['POST'])
+def bulk_update_admin_props():
+    body = request.json
+    edits = body.get('props') if isinstance(body, dict) else None
+    if not isinstance(edits, list) or not all(isinstance(edit, dict) and isinstance(edit.get('id'), int) for edit in edits):
+        return jsonify({'error': 'Invalid data format'}), 400
+    if len(edits) > MAX_BULK_EDITS:
+        return jsonify({'error': f'At most {MAX_BULK_EDITS} edits per request'}), 400
+
+    props = {
+        prop.id: prop
+        for prop in MovieProp.query.options(selectinload(MovieProp.images)).filter(MovieProp.id.in_({edit['id'] for edit in edits}))
+    }
+    missing = sorted({edit['id'] for edit in edits} - props.keys())
+    if missing:
+        return jsonify({'error': f"Props not found: {', '.join(map(str, missing))}"}), 404
+
+    changed_ids = set()
+    categories = set()
+    images_edited = False
+    try:
+        for edit in edits:
+            prop = props[edit['id']]
+            old_category = prop.category
+            if apply_prop_edit(prop, edit):
+                changed_ids.add(prop.id)
+                categories.update((old_category, prop.category))
+                images_edited = images_edited or 'images' in edit
+    except (TypeError, ValueError) as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
+    if changed_ids:
+        refresh_categories(categories)
+        if images_edited:
+            delete_orphan_image_variants()
+        bump_cache_generation('catalog')
+        db.session.commit()
+        catalog_cache.invalidate()
+        props = {prop.id: prop for prop in catalog_query().filter(MovieProp.id.in_(props.keys()))}
+        schedule_image_ingest([image.id for prop_id in changed_ids for image in props[prop_id].images])
+
     return jsonify({
-        'id': prop.id,
-        'name': prop.name,
-        'description': prop.description,
-        'price': prop.price,
-        'print_cost': prop.print_cost,
-        'category': prop.category,
-        'created_at': prop.created_at.isoformat(),
-        'images': [{
-            'id': img.id,
-            'image_url': img.image_url,
-            'order': img.order
-        } for img in prop.images]
+        'updated': len(changed_ids),
+        'unchanged': len(props) - len(changed_ids),
+        'props': [serialize_prop(props[prop_id]) for prop_id in dict.fromkeys(edit['id'] for edit in edits)]
     })
 
 @app.route('/api/admin/props/<int:prop_id>', methods=['DELETE'])
@@ -465,110 +1247,515 @@ def delete_admin_prop(prop_id):
     # Delete associated images first
     PropImage.query.filter_by(prop_id=prop.id).delete()
     db.session.delete(prop)
+    refresh_categories([prop.category])
+    delete_orphan_image_variants()
+    bump_cache_generation('catalog')
     db.session.commit()
+    catalog_cache.invalidate()
     return jsonify({'message': 'Prop deleted successfully'})
 
+# Prop images
+# Saving a prop from the admin panel schedules its images for ingestion:
+# each source image is fetched once into image_store and resized into the
+# IMAGE_VARIANTS on the image process pool. /api/images/<id>/<variant>
+# serves the stored copies; until they exist (or after the store evicted
+# them) it falls back to the original, then to the source URL.
+IMAGE_VARIANT_NAMES = ('original', *IMAGE_VARIANTS)
+IMAGE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+IMAGE_RETRY_SECONDS = 600
+pending_image_ingests = set()
+pending_image_ingests_lock = threading.Lock()
+image_fetch_failures = {}  # image id -> (source URL, time of the failed fetch)
+
+def schedule_image_ingest(image_ids):
+    # Skips images that are already queued in this worker
+    if not IMAGE_INGEST:
+        return
+    with pending_image_ingests_lock:
+        image_ids = [image_id for image_id in image_ids if image_id not in pending_image_ingests]
+        pending_image_ingests.update(image_ids)
+    if image_ids:
+        image_executor.submit(ingest_images, image_ids)
+
+def stored_image_variants(image):
+    # Variants stored for the image's current source URL, by name
+    return {
+        record.variant: record
+        for record in ImageVariant.query.filter_by(image_id=image.id, image_url=image.image_url)
+    }
+
+def save_image_variant(image, variant, data, content_type):
+    record = ImageVariant.query.filter_by(image_id=image.id, variant=variant).first()
+    if not record:
+        record = ImageVariant(image_id=image.id, variant=variant)
+        db.session.add(record)
+    record.image_url = image.image_url
+    record.digest = image_store.put(data)
+    record.content_type = content_type
+    return record
+
+def ingest_images(image_ids):
+    with app.app_context():
+        try:
+            renders = []
+            for image in PropImage.query.filter(PropImage.id.in_(image_ids)).all():
+                records = stored_image_variants(image)
+                wanted = IMAGE_VARIANT_NAMES if variants_available() else ('original',)
+                stream = image_store.open(records['original'].digest) if 'original' in records else None
+                if stream is not None:
+                    with stream:
+                        if all(name in records for name in wanted):
+                            continue
+                        data = stream.read()
+                else:
+                    try:
+                        data, content_type = fetch_image(image.image_url, max_bytes=IMAGE_MAX_BYTES, allowed_hosts=IMAGE_ALLOWED_HOSTS)
+                    except Exception as e:
+                        print(f"Error fetching image {image.id}: {str(e)}")
+                        image_fetch_failures[image.id] = (image.image_url, time.time())
+                        continue
+                    image_fetch_failures.pop(image.id, None)
+                    save_image_variant(image, 'original', data, content_type)
+                if variants_available():
+                    renders.append((image, get_process_pool('image', IMAGE_PROCESSES).submit(render_image_variants, data)))
+
+            for image, future in renders:
+                try:
+                    variants = future.result()
+                except Exception as e:
+                    print(f"Error resizing image {image.id}: {str(e)}")
+                    continue
+                for name, (data, content_type) in variants.items():
+                    save_image_variant(image, name, data, content_type)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error ingesting images: {str(e)}")
+        finally:
+            with pending_image_ingests_lock:
+                pending_image_ingests.difference_update(image_ids)
+
+def retry_image_ingest(image):
+    # Called when a stored copy is missing; sources that failed to fetch
+    # recently are not fetched again on every request
+    failure = image_fetch_failures.get(image.id)
+    if failure and failure[0] == image.image_url and time.time() - failure[1] < IMAGE_RETRY_SECONDS:
+        return
+    schedule_image_ingest([image.id])
+
+def delete_orphan_image_variants():
+    # Drops the records of images that no longer exist; the stored files are
+    # left to the store's LRU eviction
+    db.session.execute(ImageVariant.__table__.delete().where(
+        ImageVariant.image_id.notin_(select(PropImage.__table__.c.id))
+    ))
+
+@app.route('/api/images/<int:image_id>/<variant>', methods=['GET'])
+def get_image(image_id, variant):
+    if variant not in IMAGE_VARIANT_NAMES:
+        return jsonify({'error': f'Unknown image variant: {variant}'}), 404
+    image = db.session.get(PropImage, image_id)
+    if image is None:
+        return jsonify({'error': 'Image not found'}), 404
+    # ?v= is the image's version from the prop listing; an outdated link
+    # must not be cached as the new image
+    version = request.args.get('v')
+    if version and version != image_version(image.image_url):
+        return jsonify({'error': 'Image has changed'}), 404
+
+    records = stored_image_variants(image)
+    for name in (variant, 'original'):
+        record = records.get(name)
+        stream = image_store.open(record.digest) if record else None
+        if stream is None:
+            continue
+        if name != variant:
+            retry_image_ingest(image)
+        response = send_file(stream, mimetype=record.content_type, etag=record.digest, conditional=True)
+        response.headers['Cache-Control'] = IMAGE_CACHE_CONTROL if version and name == variant else 'public, no-cache'
+        return response
+
+    retry_image_ingest(image)
+    response = redirect(image.image_url)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+# Catalog export
+# Props are read through a server-side cursor in batches of EXPORT_BATCH_SIZE
+# (plus one image query per batch) and written to the response as they are
+# serialized, either as the JSON document the import reads or as NDJSON (a
+# header line, then one prop per line). The body is compressed on the fly
+# when the client accepts gzip, or zstd if the zstandard package is installed.
+EXPORT_BATCH_SIZE = 1000
+
+def iter_export_batches():
+    props = MovieProp.__table__
+    images = PropImage.__table__
+    result = db.session.execute(
+        select(props.c.id, props.c.name, props.c.description, props.c.price, props.c.print_cost, props.c.category)
+        .order_by(props.c.id)
+        .execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+    )
+    for rows in result.partitions():
+        urls = {}
+        for prop_id, image_url in db.session.execute(
+            select(images.c.prop_id, images.c.image_url)
+            .where(images.c.prop_id.in_([row.id for row in rows]))
+            .order_by(images.c.prop_id, images.c.order, images.c.id)
+        ):
+            urls.setdefault(prop_id, []).append(image_url)
+        yield [{
+            "name": row.name,
+            "description": row.description,
+            "price": row.price,
+            "print_cost": row.print_cost,
+            "category": row.category,
+            "images": urls.get(row.id, [])
+        } for row in rows]
+
+def compress_chunks(chunks, encoding):
+    if encoding == 'zstd':
+        compressor = zstandard.ZstdCompressor().compressobj()
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
 @app.route('/api/admin/export', methods=['GET'])
 def export_database():
-    props = MovieProp.query.all()
-    data = {
+    export_format = request.args.get('format', 'json')
+    if export_format not in ('json', 'ndjson'):
+        return jsonify({'error': 'Unsupported format, use json or ndjson'}), 400
+    header = {
         "schema_version": CURRENT_DB_VERSION,
-        "export_date": datetime.utcnow().isoformat(),
-        "props": [{
-            "name": prop.name,
-            "description": prop.description,
-            "price": prop.price,
-            "print_cost": prop.print_cost,
-            "category": prop.category,
-            "images": [img.image_url for img in prop.images]
-        } for prop in props]
+        "export_date": datetime.utcnow().isoformat()
     }
-    return jsonify(data)
+
+    def ndjson():
+        yield (app.json.dumps(header) + '\n').encode('utf-8')
+        for batch in iter_export_batches():
+            yield ''.join(app.json.dumps(prop) + '\n' for prop in batch).encode('utf-8')
+
+    def document():
+        # schema_version comes first, so imports can check it before the props
+        yield app.json.dumps(header)[:-1].encode('utf-8') + b', "props": ['
+        separator = ''
+        for batch in iter_export_batches():
+            yield (separator + ','.join(app.json.dumps(prop) for prop in batch)).encode('utf-8')
+            separator = ','
+        yield b']}'
+
+    chunks = ndjson() if export_format == 'ndjson' else document()
+    encoding = request.accept_encodings.best_match(['zstd', 'gzip'] if zstandard else ['gzip'])
+    if encoding:
+        chunks = compress_chunks(chunks, encoding)
+
+    mimetype = 'application/x-ndjson' if export_format == 'ndjson' else 'application/json'
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Content-Disposition'] = f'attachment; filename="movie_props.{export_format}"'
+    return response
+
+# Catalog import
+# Uploads are parsed incrementally: either the exported JSON document, whose
+# props array is read one prop at a time, or NDJSON with a
+# {"schema_version": ...} header line followed by one prop per line. Props
+# and their images are written in batches of IMPORT_BATCH_SIZE with one
+# executemany insert each, so neither the document nor the session grows
+# with the size of the catalog.
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 1000))
+IMPORT_FIELDS = ('name', 'description', 'price', 'print_cost', 'category', 'images')
+
+def check_schema_version(schema_version):
+    if schema_version != CURRENT_DB_VERSION:
+        raise ValueError(f'Schema version mismatch. Current: {CURRENT_DB_VERSION}, Import: {schema_version}. Please update your import file.')
+
+def validate_import_prop(prop_data):
+    if not isinstance(prop_data, dict):
+        raise ValueError('Invalid prop data format')
+    if not all(key in prop_data for key in IMPORT_FIELDS):
+        raise ValueError('Missing required fields')
+    if not isinstance(prop_data['name'], str) or not prop_data['name']:
+        raise ValueError('Invalid name field')
+    if not isinstance(prop_data['description'], str) or not prop_data['description']:
+        raise ValueError('Invalid description field')
+    if not isinstance(prop_data['price'], (int, float)) or prop_data['price'] <= 0:
+        raise ValueError('Invalid price field')
+    if not isinstance(prop_data['print_cost'], (int, float)) or prop_data['print_cost'] < 0:
+        raise ValueError('Invalid print cost field')
+    if not isinstance(prop_data['category'], str) or not prop_data['category']:
+        raise ValueError('Invalid category field')
+    if not isinstance(prop_data['images'], list) or not all(isinstance(url, str) for url in prop_data['images']):
+        raise ValueError('Invalid images field')
+
+def iter_import_members(stream, import_format):
+    # Yields ('schema_version', value) and ('props', iterator over the props)
+    if import_format == 'ndjson':
+        records = iter_ndjson(stream)
+        header = next(records, None)
+        if not isinstance(header, dict) or 'schema_version' not in header:
+            raise ValueError('Missing schema version')
+        yield 'schema_version', header['schema_version']
+        yield 'props', records
+    else:
+        yield from iter_json_members(stream, stream_keys=('props',))
+
+def insert_import_batch(batch, first_id):
+    # Ids are assigned here so the images can be inserted without reading
+    # the prop ids back one by one
+    db.session.execute(insert(MovieProp.__table__), [{
+        'id': first_id + i,
+        'name': prop_data['name'],
+        'description': prop_data['description'],
+        'price': prop_data['price'],
+        'print_cost': prop_data['print_cost'],
+        'category': prop_data['category']
+    } for i, prop_data in enumerate(batch)])
+    images = [{
+        'prop_id': first_id + i,
+        'image_url': image_url,
+        'order': order
+    } for i, prop_data in enumerate(batch) for order, image_url in enumerate(prop_data['images'])]
+    if images:
+        db.session.execute(insert(PropImage.__table__), images)
+
+def iter_import_batches(stream, import_format):
+    # Yields validated batches of up to IMPORT_BATCH_SIZE props. Raises
+    # ValueError for invalid uploads, at the latest once the upload is
+    # fully read
+    schema_version = None
+    found_props = False
+    for key, value in iter_import_members(stream, import_format):
+        if key == 'schema_version':
+            # Checked as soon as it is read, exported documents may list it
+            # after the props
+            check_schema_version(value)
+            schema_version = value
+        elif key == 'props':
+            found_props = True
+            batch = []
+            for prop_data in value:
+                validate_import_prop(prop_data)
+                batch.append(prop_data)
+                if len(batch) == IMPORT_BATCH_SIZE:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+    if schema_version is None:
+        raise ValueError('Missing schema version')
+    if not found_props:
+        raise ValueError('Invalid data format')
+
+def next_prop_id():
+    if db.engine.dialect.name == 'postgresql':
+        return db.session.execute(db.text("SELECT nextval(pg_get_serial_sequence('movie_prop', 'id'))")).scalar()
+    # Continue after the current ids, so props of old orders never resolve
+    # to different imported props
+    return (db.session.query(db.func.max(MovieProp.id)).scalar() or 0) + 1
+
+def sync_prop_id_sequence(last_id):
+    # Moves the Postgres serial sequence past the ids assigned by an import
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(
+            db.text("SELECT setval(pg_get_serial_sequence('movie_prop', 'id'), :value)"),
+            {'value': last_id}
+        )
+
+def import_catalog(stream, import_format='json', progress=None):
+    # Replaces the catalog with the uploaded props in the current
+    # transaction (the caller commits) and returns the counts. Raises
+    # ValueError for invalid uploads. progress(count) is called after every
+    # batch
+    next_id = first_id = next_prop_id()
+    PropImage.query.delete()
+    MovieProp.query.delete()
+
+    for batch in iter_import_batches(stream, import_format):
+        insert_import_batch(batch, next_id)
+        next_id += len(batch)
+        if progress:
+            progress(next_id - first_id)
+
+    sync_prop_id_sequence(max(next_id - 1, first_id))
+    refresh_categories()
+    delete_orphan_image_variants()
+    return {'imported': next_id - first_id}
+
+# Merge imports
+# Instead of replacing the catalog, the upload is diffed against it: props
+# are matched by name (props sharing a name pair up in id order), and only
+# new, changed and missing props are written. Existing rows keep their ids.
+MERGE_FIELDS = ('name', 'description', 'price', 'print_cost', 'category')
+
+def merge_catalog(stream, import_format='json', progress=None):
+    # Same contract as import_catalog; returns inserted, updated, deleted
+    # and unchanged counts
+    props = MovieProp.__table__
+    images = PropImage.__table__
+    counts = {'imported': 0, 'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+    matched = set()
+    categories = set()  # Categories whose props were added, changed or removed
+    next_id = first_id = next_prop_id()
+
+    for batch in iter_import_batches(stream, import_format):
+        candidates = {}
+        # Props inserted by earlier batches of this merge are not candidates
+        for row in db.session.execute(
+            select(props)
+            .where(props.c.name.in_({prop_data['name'] for prop_data in batch}), props.c.id < first_id)
+            .order_by(props.c.id)
+        ).mappings():
+            if row['id'] not in matched:
+                candidates.setdefault(row['name'], []).append(row)
+        current_images = {}
+        for prop_id, image_url in db.session.execute(
+            select(images.c.prop_id, images.c.image_url)
+            .where(images.c.prop_id.in_([row['id'] for rows in candidates.values() for row in rows]))
+            .order_by(images.c.prop_id, images.c.order, images.c.id)
+        ):
+            current_images.setdefault(prop_id, []).append(image_url)
+
+        inserts = []
+        field_updates = []
+        image_updates = []
+        for prop_data in batch:
+            rows = candidates.get(prop_data['name'])
+            if not rows:
+                inserts.append(prop_data)
+                categories.add(prop_data['category'])
+                continue
+            row = rows.pop(0)
+            matched.add(row['id'])
+            fields_changed = any(row[field] != prop_data[field] for field in MERGE_FIELDS)
+            images_changed = current_images.get(row['id'], []) != prop_data['images']
+            if fields_changed:
+                categories.update((row['category'], prop_data['category']))
+                field_updates.append({'prop_id': row['id'], **{f'new_{field}': prop_data[field] for field in MERGE_FIELDS}})
+            if images_changed:
+                image_updates.append((row['id'], prop_data['images']))
+            counts['updated' if fields_changed or images_changed else 'unchanged'] += 1
+
+        if inserts:
+            insert_import_batch(inserts, next_id)
+            next_id += len(inserts)
+            counts['inserted'] += len(inserts)
+        if field_updates:
+            db.session.execute(
+                update(props).where(props.c.id == db.bindparam('prop_id')).values({field: db.bindparam(f'new_{field}') for field in MERGE_FIELDS}),
+                field_updates
+            )
+        if image_updates:
+            db.session.execute(images.delete().where(images.c.prop_id.in_([prop_id for prop_id, _ in image_updates])))
+            rows = [{'prop_id': prop_id, 'image_url': image_url, 'order': order}
+                    for prop_id, urls in image_updates for order, image_url in enumerate(urls)]
+            if rows:
+                db.session.execute(insert(images), rows)
+        counts['imported'] += len(batch)
+        if progress:
+            progress(counts['imported'])
+
+    # Props that were neither matched nor inserted are no longer in the catalog
+    stale = []
+    for prop_id, category in db.session.execute(select(props.c.id, props.c.category)):
+        if prop_id not in matched and not first_id <= prop_id < next_id:
+            stale.append(prop_id)
+            categories.add(category)
+    for i in range(0, len(stale), IMPORT_BATCH_SIZE):
+        chunk = stale[i:i + IMPORT_BATCH_SIZE]
+        db.session.execute(images.delete().where(images.c.prop_id.in_(chunk)))
+        db.session.execute(props.delete().where(props.c.id.in_(chunk)))
+    counts['deleted'] = len(stale)
+
+    sync_prop_id_sequence(max(next_id - 1, first_id))
+    refresh_categories(categories)
+    if counts['updated'] or counts['deleted']:
+        delete_orphan_image_variants()
+    return counts
 
 @app.route('/api/admin/import', methods=['POST'])
 def import_database():
+    # ?mode=merge applies the upload as a diff instead of replacing the catalog
+    import_format = request.args.get('format')
+    if not import_format:
+        import_format = 'ndjson' if request.mimetype == 'application/x-ndjson' else 'json'
+    if import_format not in ('json', 'ndjson'):
+        return jsonify({'error': 'Unsupported format, use json or ndjson'}), 400
+    mode = request.args.get('mode', 'replace')
+    if mode not in ('replace', 'merge'):
+        return jsonify({'error': 'Unsupported mode, use replace or merge'}), 400
     try:
-        data = request.get_json()
-        
-        # Validate schema version
-        if 'schema_version' not in data:
-            return jsonify({'error': 'Missing schema version'}), 400
-            
-        schema_version = data['schema_version']
-        if schema_version != CURRENT_DB_VERSION:
-            return jsonify({
-                'error': f'Schema version mismatch. Current: {CURRENT_DB_VERSION}, Import: {schema_version}. Please update your import file.'
-            }), 400
-
-        # Validate props data
-        if 'props' not in data or not isinstance(data['props'], list):
-            return jsonify({'error': 'Invalid data format'}), 400
-
-        # Validate each prop
-        for prop_data in data['props']:
-            if not isinstance(prop_data, dict):
-                return jsonify({'error': 'Invalid prop data format'}), 400
-            if not all(key in prop_data for key in ['name', 'description', 'price', 'print_cost', 'category', 'images']):
-                return jsonify({'error': 'Missing required fields'}), 400
-            if not isinstance(prop_data['name'], str) or not prop_data['name']:
-                return jsonify({'error': 'Invalid name field'}), 400
-            if not isinstance(prop_data['description'], str) or not prop_data['description']:
-                return jsonify({'error': 'Invalid description field'}), 400
-            if not isinstance(prop_data['price'], (int, float)) or prop_data['price'] <= 0:
-                return jsonify({'error': 'Invalid price field'}), 400
-            if not isinstance(prop_data['print_cost'], (int, float)) or prop_data['print_cost'] < 0:
-                return jsonify({'error': 'Invalid print cost field'}), 400
-            if not isinstance(prop_data['category'], str) or not prop_data['category']:
-                return jsonify({'error': 'Invalid category field'}), 400
-            if not isinstance(prop_data['images'], list) or not all(isinstance(url, str) for url in prop_data['images']):
-                return jsonify({'error': 'Invalid images field'}), 400
-
-        # Clear existing data
-        PropImage.query.delete()
-        MovieProp.query.delete()
-
-        # Import new data
-        for prop_data in data['props']:
-            prop = MovieProp(
-                name=prop_data['name'],
-                description=prop_data['description'],
-                price=prop_data['price'],
-                print_cost=prop_data['print_cost'],
-                category=prop_data['category']
-            )
-            db.session.add(prop)
-            db.session.flush()  # Get the prop ID
-
-            # Add images
-            for order, image_url in enumerate(prop_data['images']):
-                image = PropImage(
-                    prop_id=prop.id,
-                    image_url=image_url,
-                    order=order
-                )
-                db.session.add(image)
-
+        stream = request.stream
+        if request.headers.get('Content-Encoding') == 'gzip':
+            stream = gzip.GzipFile(fileobj=stream)
+        counts = (merge_catalog if mode == 'merge' else import_catalog)(
+            stream,
+            import_format,
+            progress=lambda count: print(f"Catalog import: {count} props processed")
+        )
+        # A merge that changed nothing leaves the catalog caches alone
+        changed = mode == 'replace' or counts['inserted'] or counts['updated'] or counts['deleted']
+        if changed:
+            bump_cache_generation('catalog')
         db.session.commit()
-        return jsonify({'message': 'Database imported successfully'})
+        if changed:
+            catalog_cache.invalidate()
+        return jsonify({'message': 'Database imported successfully', **counts})
 
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+# Settings service
+# DiscountSettings and EmailSettings are single-row tables that are read on
+# hot paths (storefront, checkout) but written only from the admin panel.
+# They are served from settings_cache as plain dicts and reloaded after a
+# write; a missing row falls back to the column defaults without writing.
+DISCOUNT_FIELDS = ('tier1_quantity', 'tier1_discount', 'tier2_quantity', 'tier2_discount')
+EMAIL_FIELDS = ('notification_email', 'smtp_server', 'smtp_port', 'smtp_username', 'smtp_password', 'smtp_use_tls')
+
+def get_discount_settings_data():
+    data = settings_cache.get('discount')
+    if data is None:
+        version = settings_cache.version
+        settings = DiscountSettings.query.first()
+        if settings:
+            data = {field: getattr(settings, field) for field in DISCOUNT_FIELDS}
+        else:
+            data = {field: DiscountSettings.__table__.c[field].default.arg for field in DISCOUNT_FIELDS}
+        settings_cache.set('discount', data, version)
+    return data
+
+def get_discount_settings_payload():
+    payload = settings_cache.get('discount_payload')
+    if payload is None:
+        version = settings_cache.version
+        payload = json_payload(get_discount_settings_data())
+        settings_cache.set('discount_payload', payload, version)
+    return payload
+
+def get_email_settings():
+    # Returns None when no email settings row exists
+    data = settings_cache.get('email')
+    if data is None:
+        version = settings_cache.version
+        settings = EmailSettings.query.first()
+        data = {field: getattr(settings, field) for field in EMAIL_FIELDS} if settings else {}
+        settings_cache.set('email', data, version)
+    return data or None
+
 @app.route('/api/admin/discount-settings', methods=['GET'])
 def get_discount_settings():
-    settings = DiscountSettings.query.first()
-    if not settings:
-        settings = DiscountSettings()
-        db.session.add(settings)
-        db.session.commit()
-    
-    return jsonify({
-        'tier1_quantity': settings.tier1_quantity,
-        'tier1_discount': settings.tier1_discount,
-        'tier2_quantity': settings.tier2_quantity,
-        'tier2_discount': settings.tier2_discount
-    })
+    return jsonify(get_discount_settings_data())
 
 @app.route('/api/admin/discount-settings', methods=['PUT'])
 def update_discount_settings():
@@ -585,7 +1772,9 @@ def update_discount_settings():
         settings.tier2_discount = float(data['tier2_discount'])
         settings.updated_at = datetime.utcnow()
         
+        bump_cache_generation('settings')
         db.session.commit()
+        settings_cache.invalidate()
         
         return jsonify({
             'message': 'Discount settings updated successfully',
@@ -601,171 +1790,657 @@ def update_discount_settings():
 
 @app.route('/api/discount-settings', methods=['GET'])
 def get_public_discount_settings():
-    settings = DiscountSettings.query.first()
-    if not settings:
-        settings = DiscountSettings()
-        db.session.add(settings)
+    return json_payload_response(get_discount_settings_payload())
+
+# Pricing engine
+# Cart lines are priced against the catalog by prop id. The id -> (name,
+# category, price, print cost) table is tagged with the catalog cache
+# version, so it is rebuilt only after catalog writes, and a cart of any size
+# is priced in one pass over its lines with the DiscountSettings tiers
+# applied on the server. The table has its own slot rather than a catalog
+# cache entry, so browsing traffic never evicts it from the LRU.
+price_table_entry = None  # (catalog_cache version, table)
+price_table_lock = threading.Lock()
+
+def get_price_table():
+    global price_table_entry
+    with price_table_lock:
+        version = catalog_cache.version
+        if price_table_entry is None or price_table_entry[0] != version:
+            price_table_entry = (version, {
+                prop_id: (name, category, price, print_cost)
+                for prop_id, name, category, price, print_cost in db.session.query(
+                    MovieProp.id, MovieProp.name, MovieProp.category, MovieProp.price, MovieProp.print_cost
+                )
+            })
+        return price_table_entry[1]
+
+def cart_items(body):
+    # Items of a quote or invoice request body
+    if not isinstance(body, dict):
+        raise ValueError('Invalid data format')
+    return body.get('items')
+
+def quote_cart(items):
+    # Raises ValueError for unknown props or invalid quantities
+    if not isinstance(items, list) or not items:
+        raise ValueError('Cart is empty')
+    prices = get_price_table()
+    lines = []
+    subtotal = 0.0
+    total_print_cost = 0.0
+    total_quantity = 0
+
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError('Invalid cart item')
+        prop_id = item.get('id')
+        if not isinstance(prop_id, int) or isinstance(prop_id, bool) or prop_id not in prices:
+            raise ValueError(f"Unknown prop: {prop_id}")
+        quantity = item.get('quantity', 1)
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+            raise ValueError(f"Invalid quantity for prop {prop_id}")
+        printed = bool(item.get('printedVersion'))
+        name, category, price, print_cost = prices[prop_id]
+        if not printed:
+            print_cost = 0.0
+
+        subtotal += price * quantity
+        total_print_cost += print_cost * quantity
+        total_quantity += quantity
+        lines.append({
+            'id': prop_id,
+            'name': name,
+            'category': category,
+            'quantity': quantity,
+            'printedVersion': printed,
+            'price': price,
+            'print_cost': print_cost,
+            'line_total': (price + print_cost) * quantity
+        })
+
+    discount = get_discount_settings_data()
+    if total_quantity >= discount['tier2_quantity']:
+        discount_percent = discount['tier2_discount']
+    elif total_quantity >= discount['tier1_quantity']:
+        discount_percent = discount['tier1_discount']
+    else:
+        discount_percent = 0
+
+    total = subtotal + total_print_cost
+    discount_amount = total * discount_percent
+    return {
+        'items': lines,
+        'total_quantity': total_quantity,
+        'subtotal': subtotal,
+        'total_print_cost': total_print_cost,
+        'discount_percent': discount_percent,
+        'discount_amount': discount_amount,
+        'final_total': total - discount_amount
+    }
+
+@app.route('/api/quote', methods=['POST'])
+def get_quote():
+    try:
+        return jsonify(quote_cart(cart_items(request.json)))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+def pdf_response(pdf, filename):
+    response = make_response(pdf)
+    response.headers['Content-Type'] = 'application/pdf'
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['X-Filename'] = filename
+    return response
+
+# PDF artifact store
+# Rendered PDFs are written to pdf_store once and recorded in stored_pdf, so
+# later downloads stream the stored bytes instead of rendering them again.
+def store_pdf(kind, reference, pdf, filename):
+    # pdf is either the PDF bytes or a file it was rendered into. Adds the
+    # record to the session, the caller commits
+    record = StoredPdf.query.filter_by(kind=kind, reference=reference).first()
+    if not record:
+        record = StoredPdf(kind=kind, reference=reference)
+        db.session.add(record)
+    record.digest = pdf_store.put(pdf) if isinstance(pdf, bytes) else pdf_store.put_file(pdf)
+    record.filename = filename
+    return record
+
+def send_stored_pdf(kind, reference):
+    # Returns None when the PDF was never stored or has been evicted
+    record = StoredPdf.query.filter_by(kind=kind, reference=reference).first()
+    stream = pdf_store.open(record.digest) if record else None
+    if stream is None:
+        return None
+    response = send_file(stream, mimetype='application/pdf', as_attachment=True, download_name=record.filename)
+    response.headers['X-Filename'] = record.filename
+    return response
+
+def store_invoice_pdf(invoice):
+    # Renders a new invoice into the artifact store without touching the
+    # database. Returns the (unsaved) StoredPdf record and the PDF bytes,
+    # which are None for large orders
+    record = StoredPdf(kind='invoice', reference=invoice['invoice_number'], filename=f"invoice_{invoice['invoice_number']}.pdf")
+    if len(invoice['items']) <= LARGE_ORDER_LINES:
+        pdf = render_invoice_pdf(**invoice)
+        record.digest = pdf_store.put(pdf)
+        return record, pdf
+
+    # Large orders are rendered into a temporary file and copied into the
+    # store in chunks instead of being buffered (and copied) in memory
+    with tempfile.TemporaryFile() as output:
+        render_invoice_pdf(**invoice, output=output)
+        output.seek(0)
+        record.digest = pdf_store.put_file(output)
+    return record, None
+
+# Asynchronous invoice rendering
+# With ?async=true (or ASYNC_INVOICES=true) checkout commits the order and
+# returns a job id right away; the PDF is rendered on a thread pool and kept
+# in the invoice_job table so any worker can serve the status and download.
+def run_invoice_job(job_id, invoice):
+    with app.app_context():
+        job = db.session.get(InvoiceJob, job_id)
+        try:
+            record, _ = store_invoice_pdf(invoice)
+            db.session.add(record)
+            job.status = 'done'
+        except Exception as e:
+            print(f"Error rendering invoice {job.invoice_number}: {str(e)}")
+            job.status = 'failed'
+            job.error = str(e)
+        job.completed_at = datetime.utcnow()
         db.session.commit()
-    
-    return jsonify({
-        'tier1_quantity': settings.tier1_quantity,
-        'tier1_discount': settings.tier1_discount,
-        'tier2_quantity': settings.tier2_quantity,
-        'tier2_discount': settings.tier2_discount
-    })
+
+# Jobs only live in the pool of the worker that accepted the checkout. A job
+# still pending INVOICE_JOB_TIMEOUT seconds after it was queued (its worker
+# restarted or was recycled) is queued again from its order when polled.
+def invoice_from_order(order):
+    # Rebuilds the render arguments of an invoice from the stored order
+    items = [{
+        'id': line.prop_id,
+        'name': line.name,
+        'category': line.category,
+        'quantity': line.quantity,
+        'printedVersion': line.printed,
+        'price': line.unit_price,
+        'print_cost': line.unit_print_cost,
+        'line_total': line.line_total
+    } for line in order.lines]
+    subtotal = sum(item['price'] * item['quantity'] for item in items)
+    total_print_cost = sum(item['print_cost'] * item['quantity'] for item in items)
+    total = subtotal + total_print_cost
+    discount_amount = total - order.total_amount
+    return {
+        'invoice_number': order.invoice_number,
+        'customer_details': {**CUSTOMER_DETAILS, 'name': order.customer_name, 'email': order.customer_email},
+        'items': items,
+        'order_date': order.order_date,
+        'subtotal': subtotal,
+        'total_print_cost': total_print_cost,
+        'discount_percent': round(discount_amount / total, 4) if total else 0,
+        'discount_amount': discount_amount,
+        'final_total': order.total_amount
+    }
+
+def recover_invoice_job(job):
+    queued_before = datetime.utcnow() - timedelta(seconds=INVOICE_JOB_TIMEOUT)
+    if job.status != 'pending' or job.created_at > queued_before:
+        return
+    # Claimed with a conditional update so only one worker queues it again;
+    # created_at is reset, which restarts the timeout
+    jobs = InvoiceJob.__table__
+    claimed = db.session.execute(
+        update(jobs)
+        .where(jobs.c.id == job.id, jobs.c.status == 'pending', jobs.c.created_at <= queued_before)
+        .values(created_at=datetime.utcnow())
+    ).rowcount
+    if not claimed:
+        db.session.rollback()
+        return
+
+    order = Order.query.filter_by(invoice_number=job.invoice_number).first()
+    invoice = invoice_from_order(order) if order else None
+    if invoice is None:
+        job.status = 'failed'
+        job.error = 'Order not found'
+        job.completed_at = datetime.utcnow()
+    db.session.commit()
+    if invoice is not None:
+        print(f"Queueing stale invoice job {job.id} again")
+        invoice_executor.submit(run_invoice_job, job.id, invoice)
+
+def serialize_invoice_job(job):
+    return {
+        'job_id': job.id,
+        'invoice_number': job.invoice_number,
+        'status': job.status,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'completed_at': job.completed_at.isoformat() if job.completed_at else None,
+        'download_url': f"/api/invoice-jobs/{job.id}/pdf" if job.status == 'done' else None
+    }
+
+# Mock customer data for now
+CUSTOMER_DETAILS = {
+    'name': 'John Doe',
+    'email': 'john.doe@example.com',
+    'phone': '+1 (555) 123-4567'
+}
 
 @app.route('/api/generate-invoice', methods=['POST'])
 def generate_invoice():
     try:
         data = request.json
+        customer_details = CUSTOMER_DETAILS
         
-        # Mock customer data for now
-        customer_details = {
-            'name': 'John Doe',
-            'email': 'john.doe@example.com',
-            'phone': '+1 (555) 123-4567'
-        }
-        
-        # Calculate totals
-        total_print_cost = sum(
-            item.get('print_cost', 0) * item.get('quantity', 1)
-            for item in data['items']
-            if item.get('printedVersion')
-        )
-        
-        subtotal = sum(
-            item.get('price', 0) * item.get('quantity', 1)
-            for item in data['items']
-        )
-        
-        discount_percent = float(data.get('discountPercent', 0))
-        total = subtotal + total_print_cost
-        discount_amount = total * discount_percent
-        final_total = total - discount_amount
+        # Prices, print costs and the discount are resolved on the server,
+        # totals sent by the client are ignored
+        quote = quote_cart(cart_items(data))
+        data['items'] = quote['items']
+        data['discountPercent'] = quote['discount_percent']
+        subtotal = quote['subtotal']
+        total_print_cost = quote['total_print_cost']
+        discount_percent = quote['discount_percent']
+        discount_amount = quote['discount_amount']
+        final_total = quote['final_total']
         
         # Generate invoice number
         invoice_number = generate_invoice_number()
         
-        # Create new order
+        invoice = {
+            'invoice_number': invoice_number,
+            'customer_details': customer_details,
+            'items': data['items'],
+            'order_date': datetime.now(),
+            'subtotal': subtotal,
+            'total_print_cost': total_print_cost,
+            'discount_percent': discount_percent,
+            'discount_amount': discount_amount,
+            'final_total': final_total
+        }
+        async_invoice = request.args.get('async', str(ASYNC_INVOICES)).lower() == 'true'
+
+        # Render the invoice PDF before writing anything, so the checkout
+        # transaction stays short
+        if not async_invoice:
+            stored_invoice, pdf = store_invoice_pdf(invoice)
+
+        # Checkout is a single unit of work: the order, its print notification
+        # and email, and the stored invoice (or invoice job) are written
+        # with one commit
         order = Order(
             invoice_number=invoice_number,
+            order_date=datetime.utcnow(),
             total_amount=final_total,
             customer_name=customer_details['name'],
             customer_email=customer_details['email']
         )
         db.session.add(order)
-        db.session.commit()
+        db.session.flush()  # This gets us the new order's ID
+
+        # Line items are inserted with a single executemany
+        db.session.execute(insert(OrderLine.__table__), [{
+            'order_id': order.id,
+            'prop_id': line['id'],
+            'name': line['name'],
+            'category': line['category'],
+            'quantity': line['quantity'],
+            'unit_price': line['price'],
+            'unit_print_cost': line['print_cost'],
+            'printed': line['printedVersion'],
+            'line_total': line['line_total'],
+            'order_date': order.order_date
+        } for line in quote['items']])
         
         # Check for printed items
         has_printed_items = any(item.get('printedVersion') for item in data['items'])
         if has_printed_items:
             data['printCost'] = total_print_cost
             data['invoiceNumber'] = invoice_number
-            send_print_notification(data, customer_details)
-        
-        # Generate invoice PDF
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        elements = []
-
-        # Title and Invoice Number
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=10
-        )
-        elements.append(Paragraph("Invoice", title_style))
-        elements.append(Paragraph(f"Invoice #: {invoice_number}", styles['Normal']))
-        elements.append(Spacer(1, 20))
-
-        # Customer Details
-        customer_style = ParagraphStyle(
-            'CustomerInfo',
-            parent=styles['Normal'],
-            fontSize=12,
-            spaceAfter=20
-        )
-        customer_info = f"""
-        <b>Customer Details:</b><br/>
-        Name: {customer_details['name']}<br/>
-        Email: {customer_details['email']}<br/>
-        Phone: {customer_details['phone']}<br/>
-        Order Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-        """
-        elements.append(Paragraph(customer_info, customer_style))
-        elements.append(Spacer(1, 20))
-
-        # Order Details Table
-        table_data = [['Item', 'Quantity', 'Price', 'Print Cost', 'Total']]
-        
-        for item in data['items']:
-            quantity = item.get('quantity', 1)
-            price = item.get('price', 0) * quantity
-            print_cost = item.get('print_cost', 0) * quantity if item.get('printedVersion') else 0
-            total = price + print_cost
-            
-            table_data.append([
-                item.get('name', ''),
-                str(quantity),
-                f"${price:,.2f}",
-                f"${print_cost:,.2f}",
-                f"${total:,.2f}"
-            ])
-
-        # Create and style the table
-        table = Table(table_data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        elements.append(table)
-        elements.append(Spacer(1, 20))
-
-        # Add totals
-        elements.append(Paragraph(f"<b>Subtotal:</b> ${subtotal:,.2f}", styles['Normal']))
-        elements.append(Paragraph(f"<b>Total Print Cost:</b> ${total_print_cost:,.2f}", styles['Normal']))
-        if discount_percent > 0:
-            elements.append(Paragraph(f"<b>Discount ({int(discount_percent * 100)}%):</b> -${discount_amount:,.2f}", styles['Normal']))
-        elements.append(Paragraph(f"<b>Total:</b> ${final_total:,.2f}", styles['Normal']))
-
-        # Build PDF
-        doc.build(elements)
-        buffer.seek(0)
-
-        # Create response with PDF
-        response = make_response(buffer.getvalue())
-        response.headers['Content-Type'] = 'application/pdf'
-        filename = f"invoice_{invoice_number}.pdf"
-        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response.headers['X-Filename'] = filename
-        
-        return response
+            add_print_notification(data, customer_details, total_print_cost)
+
+        record_sales_rollups(order, quote)
+
+        if async_invoice:
+            job = InvoiceJob(id=uuid.uuid4().hex, invoice_number=invoice_number)
+            db.session.add(job)
+        else:
+            db.session.add(stored_invoice)
+        db.session.commit()
+
+        if has_printed_items:
+            notification_cache.invalidate()
+            outbox_wakeup.set()
+
+        if async_invoice:
+            invoice_executor.submit(run_invoice_job, job.id, invoice)
+            return jsonify(serialize_invoice_job(job)), 202
+
+        # Large orders are streamed from the store
+        if pdf is None:
+            return download_invoice(invoice_number)
+        return pdf_response(pdf, f"invoice_{invoice_number}.pdf")
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
+        db.session.rollback()
         print(f"Error generating invoice: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/invoice-jobs/<job_id>', methods=['GET'])
+def get_invoice_job(job_id):
+    job = InvoiceJob.query.get_or_404(job_id)
+    recover_invoice_job(job)
+    return jsonify(serialize_invoice_job(job))
+
+@app.route('/api/invoice-jobs/<job_id>/pdf', methods=['GET'])
+def download_invoice_job(job_id):
+    job = InvoiceJob.query.get_or_404(job_id)
+    recover_invoice_job(job)
+    if job.status == 'failed':
+        return jsonify({'error': job.error}), 500
+    if job.status != 'done':
+        return jsonify(serialize_invoice_job(job)), 202
+    return download_invoice(job.invoice_number)
+
+@app.route('/api/invoices/<invoice_number>/pdf', methods=['GET'])
+def download_invoice(invoice_number):
+    response = send_stored_pdf('invoice', invoice_number)
+    if response:
+        return response
+
+    # The PDF was evicted from the store: render it again from the order
+    order = Order.query.filter_by(invoice_number=invoice_number).first()
+    if not order:
+        return jsonify({'error': 'Invoice PDF not found'}), 404
+    stored, pdf = store_invoice_pdf(invoice_from_order(order))
+    record = StoredPdf.query.filter_by(kind='invoice', reference=invoice_number).first()
+    if record:
+        record.digest = stored.digest
+    else:
+        db.session.add(stored)
+    db.session.commit()
+    if pdf is None:
+        return send_stored_pdf('invoice', invoice_number)
+    return pdf_response(pdf, stored.filename)
+
+# Order history
+# Orders are paginated newest first with a keyset cursor on id. Customer
+# and date filters use the order_date and customer_email indexes, prop
+# filters and sales totals use the (prop_id, order_date) index on order_line.
+MAX_ORDER_PAGE_SIZE = 100
+
+def parse_date_range():
+    # Raises ValueError for dates that are not ISO 8601
+    start = request.args.get('start')
+    end = request.args.get('end')
+    return (
+        datetime.fromisoformat(start) if start else None,
+        datetime.fromisoformat(end) if end else None
+    )
+
+def serialize_order(order):
+    return {
+        'id': order.id,
+        'invoice_number': order.invoice_number,
+        'order_date': order.order_date.isoformat(),
+        'total_amount': order.total_amount,
+        'customer_name': order.customer_name,
+        'customer_email': order.customer_email,
+        'lines': [{
+            'prop_id': line.prop_id,
+            'name': line.name,
+            'category': line.category,
+            'quantity': line.quantity,
+            'unit_price': line.unit_price,
+            'unit_print_cost': line.unit_print_cost,
+            'printed': line.printed,
+            'line_total': line.line_total
+        } for line in order.lines]
+    }
+
+@app.route('/api/admin/orders', methods=['GET'])
+def get_orders():
+    try:
+        start, end = parse_date_range()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    limit = max(1, min(request.args.get('limit', 50, type=int), MAX_ORDER_PAGE_SIZE))
+    cursor = request.args.get('cursor', type=int)
+    customer_email = request.args.get('customer_email')
+    prop_id = request.args.get('prop_id', type=int)
+
+    query = Order.query.options(selectinload(Order.lines))
+    if customer_email:
+        query = query.filter(Order.customer_email == customer_email)
+    if prop_id is not None:
+        order_ids = db.session.query(OrderLine.order_id).filter(OrderLine.prop_id == prop_id)
+        if start:
+            order_ids = order_ids.filter(OrderLine.order_date >= start)
+        if end:
+            order_ids = order_ids.filter(OrderLine.order_date < end)
+        query = query.filter(Order.id.in_(order_ids))
+    if start:
+        query = query.filter(Order.order_date >= start)
+    if end:
+        query = query.filter(Order.order_date < end)
+    if cursor is not None:
+        query = query.filter(Order.id < cursor)
+
+    orders = query.order_by(Order.id.desc()).limit(limit + 1).all()
+    response = jsonify([serialize_order(order) for order in orders[:limit]])
+    if len(orders) > limit:
+        response.headers['X-Next-Cursor'] = str(orders[limit - 1].id)
+    return response
+
+@app.route('/api/admin/orders/<int:order_id>', methods=['GET'])
+def get_order(order_id):
+    order = Order.query.options(selectinload(Order.lines)).filter_by(id=order_id).first_or_404()
+    return jsonify(serialize_order(order))
+
+@app.route('/api/admin/sales', methods=['GET'])
+def get_prop_sales():
+    # Units and revenue of one prop, optionally within a date range
+    try:
+        start, end = parse_date_range()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    prop_id = request.args.get('prop_id', type=int)
+    if prop_id is None:
+        return jsonify({'error': 'Missing prop_id'}), 400
+
+    query = db.session.query(
+        db.func.count(OrderLine.id),
+        db.func.coalesce(db.func.sum(OrderLine.quantity), 0),
+        db.func.coalesce(db.func.sum(OrderLine.line_total), 0.0)
+    ).filter(OrderLine.prop_id == prop_id)
+    if start:
+        query = query.filter(OrderLine.order_date >= start)
+    if end:
+        query = query.filter(OrderLine.order_date < end)
+    lines, units, revenue = query.one()
+    return jsonify({
+        'prop_id': prop_id,
+        'start': start.isoformat() if start else None,
+        'end': end.isoformat() if end else None,
+        'order_lines': lines,
+        'units': units,
+        'revenue': revenue
+    })
+
+# Sales rollups
+# Checkout adds each order to the daily_sales, daily_prop_sales and
+# daily_category_sales rows of its day with atomic upserts in the checkout
+# transaction. rebuild_sales_rollups() recomputes them from order history
+# (run backfill_rollups.py once after upgrading).
+def upsert_increments(table, keys, rows):
+    # Inserts rows, or adds their non-key numeric values to existing rows.
+    # Columns that are neither keys nor numbers are only set on insert
+    increments = [column for column in rows[0] if column not in keys and isinstance(rows[0][column], (int, float))]
+    dialect = db.engine.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert_statement = (sqlite if dialect == 'sqlite' else postgresql).insert(table)
+        statement = insert_statement.on_conflict_do_update(
+            index_elements=keys,
+            set_={column: table.c[column] + insert_statement.excluded[column] for column in increments}
+        )
+        db.session.execute(statement, rows)
+        return
+
+    for row in rows:
+        key_filter = [table.c[key] == row[key] for key in keys]
+        result = db.session.execute(
+            update(table).where(*key_filter).values({column: table.c[column] + row[column] for column in increments})
+        )
+        if result.rowcount == 0:
+            db.session.execute(insert(table).values(row))
+
+def record_sales_rollups(order, quote):
+    day = order.order_date.date()
+    props = {}
+    categories = {}
+    for line in quote['items']:
+        units = line['quantity']
+        revenue = line['line_total']
+        print_cost = line['print_cost'] * units
+        prop = props.setdefault(line['id'], {
+            'day': day, 'prop_id': line['id'], 'name': line['name'], 'category': line['category'],
+            'units': 0, 'revenue': 0.0, 'print_cost': 0.0
+        })
+        category = categories.setdefault(line['category'], {
+            'day': day, 'category': line['category'], 'units': 0, 'revenue': 0.0, 'print_cost': 0.0
+        })
+        for row in (prop, category):
+            row['units'] += units
+            row['revenue'] += revenue
+            row['print_cost'] += print_cost
+
+    upsert_increments(DailySales.__table__, ['day'], [{
+        'day': day,
+        'orders': 1,
+        'units': quote['total_quantity'],
+        'revenue': order.total_amount,
+        'print_cost': quote['total_print_cost']
+    }])
+    upsert_increments(DailyPropSales.__table__, ['day', 'prop_id'], list(props.values()))
+    upsert_increments(DailyCategorySales.__table__, ['day', 'category'], list(categories.values()))
+
+def rebuild_sales_rollups():
+    # Recomputes all rollups from order and order_line. Orders placed before
+    # order lines were recorded only count towards orders and revenue
+    DailySales.query.delete()
+    DailyPropSales.query.delete()
+    DailyCategorySales.query.delete()
+
+    def as_date(value):
+        return value if not isinstance(value, str) else datetime.strptime(value, '%Y-%m-%d').date()
+
+    order_day = db.func.date(Order.order_date)
+    line_day = db.func.date(OrderLine.order_date)
+    line_print_cost = db.func.sum(OrderLine.unit_print_cost * OrderLine.quantity)
+
+    days = {}
+    for day, orders, revenue in db.session.query(
+        order_day, db.func.count(Order.id), db.func.sum(Order.total_amount)
+    ).group_by(order_day):
+        days[as_date(day)] = {'day': as_date(day), 'orders': orders, 'units': 0, 'revenue': revenue, 'print_cost': 0.0}
+
+    prop_rows = []
+    for day, prop_id, name, category, units, revenue, print_cost in db.session.query(
+        line_day, OrderLine.prop_id, db.func.max(OrderLine.name), db.func.max(OrderLine.category),
+        db.func.sum(OrderLine.quantity), db.func.sum(OrderLine.line_total), line_print_cost
+    ).group_by(line_day, OrderLine.prop_id):
+        prop_rows.append({
+            'day': as_date(day), 'prop_id': prop_id, 'name': name, 'category': category,
+            'units': units, 'revenue': revenue, 'print_cost': print_cost
+        })
+        days[as_date(day)]['units'] += units
+        days[as_date(day)]['print_cost'] += print_cost
+
+    category_rows = [{
+        'day': as_date(day), 'category': category, 'units': units, 'revenue': revenue, 'print_cost': print_cost
+    } for day, category, units, revenue, print_cost in db.session.query(
+        line_day, OrderLine.category, db.func.sum(OrderLine.quantity), db.func.sum(OrderLine.line_total), line_print_cost
+    ).group_by(line_day, OrderLine.category)]
+
+    for model, rows in ((DailySales, list(days.values())), (DailyPropSales, prop_rows), (DailyCategorySales, category_rows)):
+        if rows:
+            db.session.execute(insert(model.__table__), rows)
+    db.session.commit()
+    return len(days)
+
+@app.route('/api/admin/stats', methods=['GET'])
+def get_sales_stats():
+    # Dashboard figures for a date range (default: the last 30 days), read
+    # from the rollup tables only
+    try:
+        start = datetime.fromisoformat(request.args['start']).date() if request.args.get('start') else None
+        end = datetime.fromisoformat(request.args['end']).date() if request.args.get('end') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+    top = max(1, min(request.args.get('top', 10, type=int), 100))
+
+    daily = DailySales.query.filter(DailySales.day.between(start, end)).order_by(DailySales.day).all()
+    props = db.session.query(
+        DailyPropSales.prop_id, db.func.max(DailyPropSales.name), db.func.max(DailyPropSales.category),
+        db.func.sum(DailyPropSales.units), db.func.sum(DailyPropSales.revenue), db.func.sum(DailyPropSales.print_cost)
+    ).filter(DailyPropSales.day.between(start, end)).group_by(DailyPropSales.prop_id).order_by(
+        db.func.sum(DailyPropSales.revenue).desc()
+    ).limit(top).all()
+    categories = db.session.query(
+        DailyCategorySales.category, db.func.sum(DailyCategorySales.units),
+        db.func.sum(DailyCategorySales.revenue), db.func.sum(DailyCategorySales.print_cost)
+    ).filter(DailyCategorySales.day.between(start, end)).group_by(DailyCategorySales.category).all()
+
+    return jsonify({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'totals': {
+            'orders': sum(d.orders for d in daily),
+            'units': sum(d.units for d in daily),
+            'revenue': sum(d.revenue for d in daily),
+            'print_cost': sum(d.print_cost for d in daily)
+        },
+        'daily': [{
+            'day': d.day.isoformat(),
+            'orders': d.orders,
+            'units': d.units,
+            'revenue': d.revenue,
+            'print_cost': d.print_cost
+        } for d in daily],
+        'top_props': [{
+            'prop_id': prop_id,
+            'name': name,
+            'category': category,
+            'units': units,
+            'revenue': revenue,
+            'print_cost': print_cost
+        } for prop_id, name, category, units, revenue, print_cost in props],
+        'categories': [{
+            'category': category,
+            'units': units,
+            'revenue': revenue,
+            'print_cost': print_cost
+        } for category, units, revenue, print_cost in categories]
+    })
+
 @app.route('/api/settings', methods=['GET', 'PUT'])
 def handle_settings():
     if request.method == 'GET':
-        email_settings = EmailSettings.query.first()
+        email_settings = get_email_settings()
+        if not email_settings:
+            return jsonify({'error': 'Email settings not configured'}), 404
         return jsonify({
-            'notification_email': email_settings.notification_email,
-            'smtp_server': email_settings.smtp_server,
-            'smtp_port': email_settings.smtp_port,
-            'smtp_username': email_settings.smtp_username,
-            'smtp_use_tls': bool(email_settings.smtp_use_tls)
+            'notification_email': email_settings['notification_email'],
+            'smtp_server': email_settings['smtp_server'],
+            'smtp_port': email_settings['smtp_port'],
+            'smtp_username': email_settings['smtp_username'],
+            'smtp_use_tls': bool(email_settings['smtp_use_tls'])
         })
     
     elif request.method == 'PUT':
@@ -777,7 +2452,9 @@ def handle_settings():
         email_settings.smtp_username = data['smtp_username']
         email_settings.smtp_password = data.get('smtp_password', email_settings.smtp_password)
         email_settings.smtp_use_tls = data['smtp_use_tls']
+        bump_cache_generation('settings')
         db.session.commit()
+        settings_cache.invalidate()
         return jsonify({'message': 'Settings updated successfully'})
 
 @app.route('/api/seed', methods=['POST'])
@@ -811,7 +2488,11 @@ def seed_database():
         db.session.add(discount_settings)
 
         # Add sample movie props
+        bump_cache_generation('notifications')
+        bump_cache_generation('settings')
         seed_sample_data()
+        notification_cache.invalidate()
+        settings_cache.invalidate()
         
         return jsonify({'message': 'Database seeded successfully'}), 200
     except Exception as e:
@@ -886,8 +2567,13 @@ def seed_sample_data():
             )
             db.session.add(image)
 
+    refresh_categories()
+    bump_cache_generation('catalog')
     db.session.commit()
-            
+    catalog_cache.invalidate()
+
+ensure_schema()
+
 if __name__ == '__main__':
     initialize_database()
     port = int(os.getenv('PORT', 5000))
@@ -0,0 +1,10 @@
+from app import app, rebuild_sales_rollups
+
+# Rebuilds the daily sales rollups from the existing order history
+def backfill_rollups():
+    with app.app_context():
+        days = rebuild_sales_rollups()
+        print(f"Rebuilt sales rollups for {days} days")
+
+if __name__ == "__main__":
+    backfill_rollups()
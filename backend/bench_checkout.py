@@ -0,0 +1,80 @@
+import os
+import sys
+import tempfile
+import time
+
+# Checkouts per second through /api/generate-invoice, with the number of SQL
+# statements and commits per checkout. Runs against a temporary SQLite
+# database unless BENCH_DATABASE_URL is set (e.g. a Postgres URL); all
+# tables in that database are dropped and recreated, so use a scratch
+# database. PDF rendering is stubbed out to time the database side only,
+# pass --render to include it.
+#   python bench_checkout.py [checkouts, default 300] [--render]
+bench_dir = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = os.getenv('BENCH_DATABASE_URL') or 'sqlite:///' + os.path.join(bench_dir, 'bench.db')
+os.environ['PDF_STORE_DIR'] = os.path.join(bench_dir, 'pdf_store')
+os.environ.setdefault('EMAIL_DISPATCHER', 'false')
+os.environ.setdefault('IMAGE_INGEST', 'false')
+
+from sqlalchemy import event
+
+import app as app_module
+from app import app, db, EmailSettings, MovieProp
+
+CART = [{'id': 1, 'quantity': 2, 'printedVersion': True}, {'id': 2, 'quantity': 1}]
+
+def set_up():
+    db.drop_all()
+    db.create_all()
+    db.session.add_all([
+        MovieProp(name='Lightsaber', description='A prop', price=10, print_cost=3, category='Weapons'),
+        MovieProp(name='Helmet', description='A prop', price=5, print_cost=1, category='Costumes'),
+        # Printed lines enqueue a notification email
+        EmailSettings(notification_email='prints@example.com', smtp_server='localhost', smtp_port=25,
+                      smtp_username='', smtp_password='', smtp_use_tls=False)
+    ])
+    db.session.commit()
+    db.session.remove()
+
+def bench(client, engine, url, count):
+    counts = {'statements': 0, 'commits': 0}
+
+    def statement(*args):
+        counts['statements'] += 1
+
+    def commit(*args):
+        counts['commits'] += 1
+
+    for _ in range(5):  # Warm up
+        client.post(url, json={'items': CART})
+    event.listen(engine, 'before_cursor_execute', statement)
+    event.listen(engine, 'commit', commit)
+    try:
+        start = time.perf_counter()
+        for _ in range(count):
+            response = client.post(url, json={'items': CART})
+            if response.status_code not in (200, 202):
+                raise RuntimeError(response.get_json())
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, 'before_cursor_execute', statement)
+        event.remove(engine, 'commit', commit)
+    return count / elapsed, counts['statements'] / count, counts['commits'] / count
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != '--render']
+    count = int(args[0]) if args else 300
+    if '--render' not in sys.argv:
+        app_module.render_invoice_pdf = lambda *args, **kwargs: b'%PDF-1.4 stub'
+        # Async jobs would otherwise keep rendering in the background
+        app_module.invoice_executor.submit = lambda *args, **kwargs: None
+
+    with app.app_context():
+        set_up()
+        engine = db.engine
+    client = app.test_client()
+    print(f"database: {engine.url.get_backend_name()}")
+    print(f"{'mode':>6} {'checkouts/s':>12} {'statements':>11} {'commits':>8}")
+    for mode, url in (('sync', '/api/generate-invoice'), ('async', '/api/generate-invoice?async=true')):
+        rate, statements, commits = bench(client, engine, url, count)
+        print(f"{mode:>6} {rate:>12.0f} {statements:>11.1f} {commits:>8.1f}")
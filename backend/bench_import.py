@@ -0,0 +1,54 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Catalog import time and peak traced memory for an exported JSON document
+# and for NDJSON, imported through /api/admin/import. Runs against a
+# temporary SQLite database unless BENCH_DATABASE_URL is set; the catalog in
+# that database is replaced.
+#   python bench_import.py [props, default 100000]
+os.environ['DATABASE_URL'] = os.getenv('BENCH_DATABASE_URL') or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ.setdefault('EMAIL_DISPATCHER', 'false')
+os.environ.setdefault('IMAGE_INGEST', 'false')
+
+from app import app, db, CURRENT_DB_VERSION, MovieProp
+
+def catalog(count):
+    return [{
+        'name': f"Prop {i}",
+        'description': 'A prop ' * 10,
+        'price': 10 + i % 90,
+        'print_cost': 2,
+        'category': f"Category {i % 12}",
+        'images': [f"https://example.com/{i}/a.jpg", f"https://example.com/{i}/b.jpg"]
+    } for i in range(count)]
+
+def bench(client, body, content_type):
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = client.post('/api/admin/import', data=body, content_type=content_type)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    if response.status_code != 200:
+        raise RuntimeError(response.get_json())
+    return elapsed, peak
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    props = catalog(count)
+    document = json.dumps({'schema_version': CURRENT_DB_VERSION, 'props': props}).encode('utf-8')
+    ndjson = '\n'.join([json.dumps({'schema_version': CURRENT_DB_VERSION})] + [json.dumps(prop) for prop in props]).encode('utf-8')
+    del props
+
+    client = app.test_client()
+    print(f"{'format':>7} {'props':>7} {'MB':>6} {'seconds':>8} {'peak MB':>8}")
+    for name, body, content_type in (('json', document, 'application/json'), ('ndjson', ndjson, 'application/x-ndjson')):
+        elapsed, peak = bench(client, body, content_type)
+        with app.app_context():
+            assert MovieProp.query.count() == count
+            db.session.remove()
+        print(f"{name:>7} {count:>7} {len(body) / 1e6:>6.1f} {elapsed:>8.2f} {peak / 1e6:>8.1f}")
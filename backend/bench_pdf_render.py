@@ -0,0 +1,83 @@
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import TableStyle
+
+import pdf_render
+
+# Per-invoice render time and peak allocation for carts of 1, 50 and 500
+# lines. With --rebuild-styles the stylesheet, paragraph styles and table
+# style are built again for every invoice, as the request handler did before
+# they moved into pdf_render
+CART_SIZES = (1, 50, 500)
+
+def invoice_args(lines):
+    items = [{
+        'name': f"Prop {i}",
+        'quantity': 2,
+        'price': 10.5,
+        'print_cost': 3.0,
+        'printedVersion': i % 2 == 0
+    } for i in range(lines)]
+    return {
+        'invoice_number': '202401-0001',
+        'customer_details': {'name': 'John Doe', 'email': 'john.doe@example.com', 'phone': '+1 (555) 123-4567'},
+        'items': items,
+        'order_date': datetime(2024, 1, 1, 12, 0),
+        'subtotal': 21.0 * lines,
+        'total_print_cost': 3.0 * lines,
+        'discount_percent': 0.1,
+        'discount_amount': 2.4 * lines,
+        'final_total': 21.6 * lines
+    }
+
+def rebuild_styles():
+    styles = getSampleStyleSheet()
+    ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=24, spaceAfter=10)
+    ParagraphStyle('CustomerInfo', parent=styles['Normal'], fontSize=12, spaceAfter=20)
+    ParagraphStyle('Total', parent=styles['Normal'], fontSize=14, spaceAfter=20, alignment=2)
+    TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+def render(args, restyle):
+    if restyle:
+        rebuild_styles()
+    return pdf_render.render_invoice_pdf(**args)
+
+def bench(lines, restyle=False, min_seconds=1.0):
+    args = invoice_args(lines)
+    render(args, restyle)  # Warm up fonts and caches
+
+    runs = 0
+    start = time.perf_counter()
+    while runs == 0 or time.perf_counter() - start < min_seconds:
+        render(args, restyle)
+        runs += 1
+    elapsed = (time.perf_counter() - start) / runs
+
+    tracemalloc.start()
+    render(args, restyle)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, runs
+
+if __name__ == "__main__":
+    restyle = '--rebuild-styles' in sys.argv
+    print(f"{'lines':>6} {'ms/invoice':>11} {'peak KiB':>9} {'runs':>5}")
+    for lines in CART_SIZES:
+        elapsed, peak, runs = bench(lines, restyle)
+        print(f"{lines:>6} {elapsed * 1000:>11.1f} {peak / 1024:>9.0f} {runs:>5}")
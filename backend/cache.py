@@ -0,0 +1,65 @@
+import threading
+from collections import OrderedDict
+
+# In-process LRU cache whose entries are tied to a catalog version.
+# Writers call invalidate() (which bumps the version), so readers never see
+# entries computed against an older catalog. Writes made by other worker
+# processes are picked up through sync() with a shared generation number.
+class VersionedCache:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.version = 0
+        self.generation = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != self.version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, version=None):
+        with self._lock:
+            # Drop values computed against a catalog that has since changed
+            if version is not None and version != self.version:
+                return
+            self._entries[key] = (self.version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    def sync(self, generation):
+        with self._lock:
+            if generation == self.generation:
+                return
+            self.generation = generation
+            self.version += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'version': self.version,
+                'generation': self.generation,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
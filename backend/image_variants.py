@@ -0,0 +1,94 @@
+import hashlib
+import ipaddress
+import socket
+import urllib.parse
+import urllib.request
+from io import BytesIO
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Optional, without Pillow only the original images are stored
+    Image = None
+
+# Local copies of prop images.
+# Images are fetched from their source URL once and resized into fixed
+# variants: thumb is cropped to fill the storefront cards, large is scaled to
+# fit the detail view. Each comes as JPEG and as WebP.
+IMAGE_VARIANTS = {
+    'thumb': ((480, 320), True, 'JPEG'),
+    'thumb.webp': ((480, 320), True, 'WEBP'),
+    'large': ((1200, 1200), False, 'JPEG'),
+    'large.webp': ((1200, 1200), False, 'WEBP')
+}
+CONTENT_TYPES = {'JPEG': 'image/jpeg', 'WEBP': 'image/webp'}
+
+def variants_available():
+    return Image is not None
+
+def image_version(image_url):
+    # Short fingerprint of the source URL, so image URLs can be cached for good
+    return hashlib.sha1(image_url.encode('utf-8')).hexdigest()[:12]
+
+def check_image_url(url, allowed_hosts=()):
+    # Image URLs are fetched by the server and the result is served publicly,
+    # so they must not reach loopback, private, link-local or other internal
+    # addresses. Every address the host resolves to is checked; hosts in
+    # allowed_hosts (e.g. a local image server in development) are exempt
+    parsed = urllib.parse.urlsplit(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise ValueError(f"Unsupported image URL: {url}")
+    if parsed.hostname in allowed_hosts:
+        return
+    try:
+        addresses = socket.getaddrinfo(parsed.hostname, parsed.port or (443 if parsed.scheme == 'https' else 80),
+                                       proto=socket.IPPROTO_TCP)
+    except socket.gaierror as e:
+        raise ValueError(f"Cannot resolve image host {parsed.hostname}: {e}")
+    for address in addresses:
+        ip = ipaddress.ip_address(address[4][0].split('%')[0])
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"Image host {parsed.hostname} resolves to a non-public address")
+
+class CheckedRedirectHandler(urllib.request.HTTPRedirectHandler):
+    # Redirect targets are checked like the original URL
+    def __init__(self, allowed_hosts):
+        self.allowed_hosts = allowed_hosts
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        check_image_url(newurl, self.allowed_hosts)
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+def fetch_image(url, timeout=10, max_bytes=10 * 1024 * 1024, allowed_hosts=()):
+    # Returns (data, content_type); raises ValueError for anything that is
+    # not an image of at most max_bytes on a public host
+    check_image_url(url, allowed_hosts)
+    opener = urllib.request.build_opener(CheckedRedirectHandler(allowed_hosts))
+    request = urllib.request.Request(url, headers={'User-Agent': 'movie-props-images'})
+    with opener.open(request, timeout=timeout) as response:
+        content_type = response.headers.get_content_type()
+        if not content_type.startswith('image/'):
+            raise ValueError(f"Not an image: {content_type}")
+        data = response.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ValueError("Image too large")
+    return data, content_type
+
+def render_image_variants(data):
+    # Returns {variant: (data, content_type)}. Runs in a worker process
+    with Image.open(BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original).convert('RGB')
+
+    variants = {}
+    for name, (size, crop, image_format) in IMAGE_VARIANTS.items():
+        if crop:
+            resized = ImageOps.fit(image, size, Image.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail(size, Image.LANCZOS)
+        buffer = BytesIO()
+        if image_format == 'JPEG':
+            resized.save(buffer, image_format, quality=85, optimize=True, progressive=True)
+        else:
+            resized.save(buffer, image_format, quality=80, method=4)
+        variants[name] = (buffer.getvalue(), CONTENT_TYPES[image_format])
+    return variants
@@ -0,0 +1,23 @@
+import sys
+from app import app, db, import_catalog, merge_catalog, bump_cache_generation
+
+# Imports an exported JSON document or an NDJSON file, printing progress
+# while it is written. With --merge only new, changed and removed props are
+# written instead of replacing the catalog
+def import_file(path, merge=False):
+    import_format = 'ndjson' if path.endswith('.ndjson') else 'json'
+    with app.app_context():
+        with open(path, 'rb') as f:
+            counts = (merge_catalog if merge else import_catalog)(
+                f, import_format, progress=lambda count: print(f"{count} props processed")
+            )
+        bump_cache_generation('catalog')
+        db.session.commit()
+        print(", ".join(f"{name}: {count}" for name, count in counts.items()))
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != '--merge']
+    if len(args) != 1:
+        print("Usage: python import_catalog.py [--merge] <catalog.json|catalog.ndjson>")
+        sys.exit(1)
+    import_file(args[0], merge='--merge' in sys.argv)
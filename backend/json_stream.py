@@ -0,0 +1,140 @@
+import codecs
+import json
+import re
+
+# Incremental JSON readers for uploads that are too large to load at once.
+# The input file object is read in chunks and decoded one value at a time
+# with json.JSONDecoder.raw_decode, so memory is bounded by the largest
+# single value instead of the whole document.
+CHUNK_SIZE = 64 * 1024
+MAX_VALUE_SIZE = 16 * 1024 * 1024
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+decoder = json.JSONDecoder()
+
+class JsonStreamReader:
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        # Appends the next chunk, dropping what was already consumed.
+        # Returns False at the end of the input
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+        text = self.utf8.decode(chunk or b'', final=self.eof)
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        return not self.eof
+
+    def peek(self):
+        # Next non-whitespace character, '' at the end of the input
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill() and self.pos >= len(self.buffer):
+                return ''
+
+    def take(self):
+        char = self.peek()
+        self.pos += 1
+        return char
+
+    def expect(self, char):
+        if self.take() != char:
+            raise ValueError(f"Invalid JSON: expected '{char}'")
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+                # A value that ends exactly at the buffer end may be a
+                # truncated number, so it is only accepted at EOF
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise ValueError(f"Invalid JSON: {e}")
+            if len(self.buffer) - self.pos > MAX_VALUE_SIZE:
+                raise ValueError("Invalid JSON: value too large")
+            self.fill()
+
+def iter_json_members(f, stream_keys=(), chunk_size=CHUNK_SIZE):
+    # Yields (key, value) for the members of a top-level JSON object. For
+    # keys in stream_keys the value must be an array and is yielded as an
+    # iterator over its elements, which has to be consumed before the next
+    # member is read.
+    reader = JsonStreamReader(f, chunk_size)
+    reader.expect('{')
+    if reader.peek() == '}':
+        reader.take()
+    else:
+        while True:
+            key = reader.value()
+            if not isinstance(key, str):
+                raise ValueError("Invalid JSON: expected an object key")
+            reader.expect(':')
+            if key in stream_keys:
+                elements = iter_json_array(reader, key)
+                yield key, elements
+                for _ in elements:
+                    pass
+            else:
+                yield key, reader.value()
+            separator = reader.take()
+            if separator == '}':
+                break
+            if separator != ',':
+                raise ValueError("Invalid JSON: expected ',' or '}'")
+    if reader.peek() != '':
+        raise ValueError("Invalid JSON: unexpected data after the document")
+
+def iter_json_array(reader, key):
+    if reader.take() != '[':
+        raise ValueError(f'"{key}" must be an array')
+    if reader.peek() == ']':
+        reader.take()
+        return
+    while True:
+        yield reader.value()
+        separator = reader.take()
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ValueError("Invalid JSON: expected ',' or ']'")
+
+def iter_lines(f, chunk_size=CHUNK_SIZE):
+    # Reads in chunks, raw streams such as a request body would otherwise
+    # be read byte by byte by readline()
+    pending = b''
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        if len(pending) > MAX_VALUE_SIZE:
+            raise ValueError("Invalid JSON: line too long")
+        yield from lines
+    if pending:
+        yield pending
+
+def iter_ndjson(f, chunk_size=CHUNK_SIZE):
+    # One JSON value per line; blank lines are skipped
+    for number, line in enumerate(iter_lines(f, chunk_size), 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON on line {number}: {e}")
@@ -0,0 +1,58 @@
+import smtplib
+from email.mime.text import MIMEText
+
+# SMTP sending for the email outbox.
+# SmtpSender keeps one connection open and reuses it for every message sent
+# with the same settings, reconnecting only when the settings change or the
+# server dropped the connection. Messages are sent from sender when given,
+# otherwise from sender_address(config).
+class SmtpSender:
+    def __init__(self, timeout=30, sender=None):
+        self.timeout = timeout
+        self.sender = sender
+        self._smtp = None
+        self._config = None
+
+    def send(self, config, recipient, subject, body):
+        message = MIMEText(body)
+        message['Subject'] = subject
+        message['From'] = self.sender or sender_address(config)
+        message['To'] = recipient
+        self._connection(config).send_message(message)
+
+    def _connection(self, config):
+        if self._smtp is not None and self._config == config:
+            try:
+                self._smtp.noop()
+                return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+        self.close()
+
+        smtp = smtplib.SMTP(config['smtp_server'], config['smtp_port'], timeout=self.timeout)
+        if config['smtp_use_tls']:
+            smtp.starttls()
+        if config['smtp_username'] and config['smtp_password']:
+            smtp.login(config['smtp_username'], config['smtp_password'])
+        self._smtp = smtp
+        self._config = dict(config)
+        return smtp
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+        self._smtp = None
+        self._config = None
+
+def sender_address(config):
+    # The SMTP login is used when it is an address; relays without
+    # authentication have none, so the notification address is used instead
+    username = config.get('smtp_username') or ''
+    return username if '@' in username else config['notification_email']
+
+def retry_delay(attempts, base=30, cap=3600):
+    # Exponential backoff in seconds: 30s, 60s, 120s, ... up to an hour
+    return min(cap, base * 2 ** max(attempts - 1, 0))
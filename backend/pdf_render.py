@@ -0,0 +1,164 @@
+import json
+from io import BytesIO
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import Table, TableStyle, SimpleDocTemplate, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+# Shared PDF layout for invoices and print notifications.
+# Styles and table style commands are built once at import and reused by
+# every render instead of being recreated per request.
+styles = getSampleStyleSheet()
+normal_style = styles['Normal']
+
+title_style = ParagraphStyle(
+    'CustomTitle',
+    parent=styles['Heading1'],
+    fontSize=24,
+    spaceAfter=10
+)
+
+customer_style = ParagraphStyle(
+    'CustomerInfo',
+    parent=normal_style,
+    fontSize=12,
+    spaceAfter=20
+)
+
+total_style = ParagraphStyle(
+    'Total',
+    parent=normal_style,
+    fontSize=14,
+    spaceAfter=20,
+    alignment=2  # Right alignment
+)
+
+table_style = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 14),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+    ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 12),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+INVOICE_HEADER = ['Item', 'Quantity', 'Price', 'Print Cost', 'Total']
+PRINT_NOTIFICATION_HEADER = ['Item', 'Quantity', 'Price', 'Print Cost']
+
+# Orders with more lines than this are rendered in large-order mode: the line
+# items are split into page-sized tables that each repeat the header, so
+# ReportLab never has to measure and split one huge table
+LARGE_ORDER_LINES = 100
+ROWS_PER_TABLE = 30
+
+def build_pdf(elements, output=None):
+    # Writes into output when given (e.g. a temporary file), otherwise
+    # returns the PDF bytes
+    if output is not None:
+        SimpleDocTemplate(output, pagesize=letter).build(elements)
+        return None
+    buffer = BytesIO()
+    SimpleDocTemplate(buffer, pagesize=letter).build(elements)
+    return buffer.getvalue()
+
+def header_elements(title, invoice_number, customer_info):
+    return [
+        Paragraph(title, title_style),
+        Paragraph(f"Invoice #: {invoice_number}", normal_style),
+        Spacer(1, 20),
+        Paragraph(customer_info, customer_style),
+        Spacer(1, 20)
+    ]
+
+def line_item_table(table_data):
+    table = Table(table_data)
+    table.setStyle(table_style)
+    return table
+
+def line_item_tables(header, rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == ROWS_PER_TABLE:
+            yield line_item_table([header, *chunk])
+            chunk = []
+    if chunk:
+        yield line_item_table([header, *chunk])
+
+def invoice_rows(items):
+    for item in items:
+        quantity = item.get('quantity', 1)
+        price = item.get('price', 0) * quantity
+        print_cost = item.get('print_cost', 0) * quantity if item.get('printedVersion') else 0
+        total = price + print_cost
+
+        yield [
+            item.get('name', ''),
+            str(quantity),
+            f"${price:,.2f}",
+            f"${print_cost:,.2f}",
+            f"${total:,.2f}"
+        ]
+
+def render_invoice_pdf(invoice_number, customer_details, items, order_date, subtotal,
+                       total_print_cost, discount_percent, discount_amount, final_total, output=None):
+    customer_info = f"""
+    <b>Customer Details:</b><br/>
+    Name: {customer_details['name']}<br/>
+    Email: {customer_details['email']}<br/>
+    Phone: {customer_details['phone']}<br/>
+    Order Date: {order_date.strftime('%Y-%m-%d %H:%M:%S')}
+    """
+    elements = header_elements("Invoice", invoice_number, customer_info)
+
+    # Order Details Table
+    if len(items) > LARGE_ORDER_LINES:
+        elements.extend(line_item_tables(INVOICE_HEADER, invoice_rows(items)))
+    else:
+        elements.append(line_item_table([INVOICE_HEADER, *invoice_rows(items)]))
+    elements.append(Spacer(1, 20))
+
+    # Totals
+    elements.append(Paragraph(f"<b>Subtotal:</b> ${subtotal:,.2f}", normal_style))
+    elements.append(Paragraph(f"<b>Total Print Cost:</b> ${total_print_cost:,.2f}", normal_style))
+    if discount_percent > 0:
+        elements.append(Paragraph(f"<b>Discount ({int(discount_percent * 100)}%):</b> -${discount_amount:,.2f}", normal_style))
+    elements.append(Paragraph(f"<b>Total:</b> ${final_total:,.2f}", normal_style))
+
+    return build_pdf(elements, output)
+
+def render_print_notification_pdf(notification):
+    customer_info = f"""
+    <b>Customer Details:</b><br/>
+    Name: {notification.customer_name}<br/>
+    Email: {notification.customer_email}<br/>
+    Order Date: {notification.order_date.strftime('%Y-%m-%d %H:%M:%S')}
+    """
+    elements = header_elements("Print Order Notification", notification.invoice_number, customer_info)
+
+    # Order Details Table
+    order_details = notification.order_details
+    if isinstance(order_details, str):
+        order_details = json.loads(order_details)
+
+    table_data = [PRINT_NOTIFICATION_HEADER]
+    for item in order_details.get('items', []):
+        if item.get('printedVersion'):
+            table_data.append([
+                item['name'],
+                str(item['quantity']),
+                f"${item.get('price', 0):,.2f}",
+                f"${item.get('print_cost', 0):,.2f}"
+            ])
+    elements.append(line_item_table(table_data))
+    elements.append(Spacer(1, 20))
+
+    # Total
+    elements.append(Paragraph(f"<b>Total Print Cost: ${notification.total_print_cost}</b>", total_style))
+
+    return build_pdf(elements)
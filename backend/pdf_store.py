@@ -0,0 +1,155 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+# Content-addressed storage for rendered PDFs and locally stored prop images.
+# Artifacts are keyed by the SHA-256 of their bytes, so storing the same PDF
+# twice is a no-op. Backends implement put(data) -> key, put_file(f) -> key
+# for PDFs rendered into a file, and open(key), which returns a readable
+# binary file object or None when the artifact is gone.
+class ArtifactStore:
+    def put(self, data):
+        raise NotImplementedError
+
+    def put_file(self, f):
+        raise NotImplementedError
+
+    def open(self, key):
+        raise NotImplementedError
+
+# Local filesystem backend with a total size limit; the least recently used
+# artifacts (by modification time, refreshed on every read) are evicted first.
+# suffix is the file extension of the stored artifacts.
+# The directory is scanned once on startup and the total size is kept as a
+# running count. Only when it goes over max_bytes does a background thread
+# walk the store and evict down to EVICT_TO of the limit, so writes never
+# walk the directory themselves.
+class LocalArtifactStore(ArtifactStore):
+    EVICT_TO = 0.9
+
+    def __init__(self, root, max_bytes, suffix='.pdf'):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        os.makedirs(root, exist_ok=True)
+        self.lock = threading.Lock()
+        self.evicting = False
+        # Bytes written by this process, to account for writes during an eviction
+        self.written = 0
+        self.total = sum(size for _, size, _ in self._artifacts())
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], f"{key}{self.suffix}")
+
+    def put(self, data):
+        key = hashlib.sha256(data).hexdigest()
+        path = self._path(key)
+        if os.path.exists(path):
+            os.utime(path)
+            return key
+
+        # Write to a temporary file first so readers never see partial PDFs
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._added(os.path.getsize(path))
+        return key
+
+    def put_file(self, f, chunk_size=64 * 1024):
+        # Copies f in chunks while hashing it, so large PDFs are never held
+        # in memory as a whole
+        digest = hashlib.sha256()
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as tmp:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+                tmp.write(chunk)
+        key = digest.hexdigest()
+        path = self._path(key)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            os.utime(path)
+            return key
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        self._added(os.path.getsize(path))
+        return key
+
+    def open(self, key):
+        path = self._path(key)
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return f
+
+    def _artifacts(self):
+        # (mtime, size, path) of every stored artifact
+        artifacts = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if not filename.endswith(self.suffix):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                artifacts.append((stat.st_mtime, stat.st_size, path))
+        return artifacts
+
+    def _added(self, size):
+        with self.lock:
+            self.total += size
+            self.written += size
+            if self.total <= self.max_bytes or self.evicting:
+                return
+            self.evicting = True
+        threading.Thread(target=self._evict_in_background, daemon=True).start()
+
+    def _evict_in_background(self):
+        try:
+            self.evict()
+        except Exception as e:
+            print(f"Error evicting artifacts from {self.root}: {e}")
+        finally:
+            with self.lock:
+                self.evicting = False
+
+    def evict(self):
+        # Removes the least recently used artifacts until the store is below
+        # EVICT_TO of max_bytes and resynchronizes the running total, which
+        # also picks up artifacts written by other processes
+        started = time.time()
+        with self.lock:
+            written = self.written
+        artifacts = sorted(self._artifacts())
+        total = sum(size for _, size, _ in artifacts)
+        target = self.max_bytes * self.EVICT_TO
+        for mtime, size, path in artifacts:
+            # Artifacts written or read since the walk started are kept
+            if total <= target or mtime >= started:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self.lock:
+            self.total = total + self.written - written
+
+ARTIFACT_STORE_BACKENDS = {
+    'local': LocalArtifactStore
+}
+
+def create_artifact_store(backend, **options):
+    if backend not in ARTIFACT_STORE_BACKENDS:
+        raise ValueError(f"Unknown artifact store backend: {backend}")
+    return ARTIFACT_STORE_BACKENDS[backend](**options)
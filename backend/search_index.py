@@ -0,0 +1,194 @@
+import bisect
+import math
+import re
+import threading
+from collections import Counter
+from sqlalchemy import text
+
+# Full-text search over prop names and descriptions.
+# Backends implement install(connection), which creates whatever the index
+# needs if it is missing, drop(connection) and search(connection, terms, category, limit,
+# offset) -> (ids, total, facets): the matching prop ids of the requested
+# page, best first, the number of matches in category (or overall), and the
+# match count per category. Every term has to match, as a word prefix; name
+# matches rank above description matches.
+TOKEN = re.compile(r'\w+')
+
+def tokenize(value):
+    return TOKEN.findall(value.lower())
+
+class SearchBackend:
+    def __init__(self, cache=None):
+        self.cache = cache
+
+    def install(self, connection):
+        pass
+
+    def drop(self, connection):
+        pass
+
+    def search(self, connection, terms, category=None, limit=20, offset=0):
+        raise NotImplementedError
+
+# SQLite FTS5 external-content table over movie_prop, kept in sync by
+# triggers, so every write path (including bulk imports) updates it
+class Fts5SearchBackend(SearchBackend):
+    SCHEMA = [
+        "CREATE VIRTUAL TABLE prop_search USING fts5("
+        "name, description, content='movie_prop', content_rowid='id', prefix='2 3')",
+        "CREATE TRIGGER IF NOT EXISTS movie_prop_search_insert AFTER INSERT ON movie_prop BEGIN "
+        "INSERT INTO prop_search(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+        "CREATE TRIGGER IF NOT EXISTS movie_prop_search_delete AFTER DELETE ON movie_prop BEGIN "
+        "INSERT INTO prop_search(prop_search, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); END",
+        "CREATE TRIGGER IF NOT EXISTS movie_prop_search_update AFTER UPDATE OF name, description ON movie_prop BEGIN "
+        "INSERT INTO prop_search(prop_search, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); "
+        "INSERT INTO prop_search(rowid, name, description) VALUES (new.id, new.name, new.description); END"
+    ]
+
+    def install(self, connection):
+        exists = connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'prop_search'"
+        )).first()
+        if exists:
+            # Triggers are dropped together with movie_prop
+            for statement in self.SCHEMA[1:]:
+                connection.execute(text(statement))
+            return
+        for statement in self.SCHEMA:
+            connection.execute(text(statement))
+        connection.execute(text("INSERT INTO prop_search(prop_search) VALUES ('rebuild')"))
+
+    def drop(self, connection):
+        connection.execute(text("DROP TABLE IF EXISTS prop_search"))
+
+    def search(self, connection, terms, category=None, limit=20, offset=0):
+        params = {'query': ' '.join('"%s"*' % term for term in terms)}
+        matches = "FROM prop_search JOIN movie_prop ON movie_prop.id = prop_search.rowid WHERE prop_search MATCH :query"
+        facets = dict(connection.execute(text(
+            f"SELECT movie_prop.category, count(*) {matches} GROUP BY movie_prop.category"
+        ), params).all())
+        if category:
+            matches += " AND movie_prop.category = :category"
+            params['category'] = category
+        ids = connection.execute(text(
+            f"SELECT movie_prop.id {matches} ORDER BY bm25(prop_search, 10.0, 1.0), movie_prop.id LIMIT :limit OFFSET :offset"
+        ), {**params, 'limit': limit, 'offset': offset}).scalars().all()
+        total = facets.get(category, 0) if category else sum(facets.values())
+        return ids, total, facets
+
+# Postgres: a GIN index over the tsvector of name and description. The index
+# is on an expression of the row itself, so it never goes out of sync
+class PostgresSearchBackend(SearchBackend):
+    DOCUMENT = "to_tsvector('english', movie_prop.name || ' ' || movie_prop.description)"
+    RANK = ("ts_rank(setweight(to_tsvector('english', movie_prop.name), 'A') || "
+            "setweight(to_tsvector('english', movie_prop.description), 'D'), to_tsquery('english', :query))")
+
+    def install(self, connection):
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_movie_prop_search ON movie_prop USING gin (({self.DOCUMENT}))"
+        ))
+
+    def search(self, connection, terms, category=None, limit=20, offset=0):
+        params = {'query': ' & '.join(f"{term}:*" for term in terms)}
+        matches = f"FROM movie_prop WHERE {self.DOCUMENT} @@ to_tsquery('english', :query)"
+        facets = dict(connection.execute(text(
+            f"SELECT category, count(*) {matches} GROUP BY category"
+        ), params).all())
+        if category:
+            matches += " AND category = :category"
+            params['category'] = category
+        ids = connection.execute(text(
+            f"SELECT id {matches} ORDER BY {self.RANK} DESC, id LIMIT :limit OFFSET :offset"
+        ), {**params, 'limit': limit, 'offset': offset}).scalars().all()
+        total = facets.get(category, 0) if category else sum(facets.values())
+        return ids, total, facets
+
+# In-process inverted index for other databases. It is built from the
+# catalog on first use and tagged with the version of the given
+# VersionedCache, so it is rebuilt after catalog writes in any worker. It is
+# kept in its own slot rather than as a cache entry, so the per-query
+# entries of the cache's LRU never evict it.
+class InvertedIndex:
+    NAME_WEIGHT = 10
+
+    def __init__(self, rows):
+        self.postings = {}
+        self.categories = {}
+        for prop_id, name, description, category in rows:
+            self.categories[prop_id] = category
+            weights = Counter(tokenize(description))
+            for token in tokenize(name):
+                weights[token] += self.NAME_WEIGHT
+            for token, weight in weights.items():
+                self.postings.setdefault(token, {})[prop_id] = weight
+        self.vocabulary = sorted(self.postings)
+
+    def expand(self, term):
+        start = bisect.bisect_left(self.vocabulary, term)
+        end = bisect.bisect_left(self.vocabulary, term + '\uffff')
+        return self.vocabulary[start:end]
+
+    def scores(self, terms):
+        total = len(self.categories)
+        scores = None
+        for term in terms:
+            term_scores = {}
+            for token in self.expand(term):
+                postings = self.postings[token]
+                idf = math.log(1 + total / len(postings))
+                for prop_id, weight in postings.items():
+                    term_scores[prop_id] = term_scores.get(prop_id, 0) + weight * idf
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {prop_id: score + term_scores[prop_id] for prop_id, score in scores.items() if prop_id in term_scores}
+        return scores or {}
+
+class MemorySearchBackend(SearchBackend):
+    def __init__(self, cache=None):
+        super().__init__(cache)
+        self.entry = None  # (cache version, index)
+        self.lock = threading.Lock()
+
+    def index(self, connection):
+        with self.lock:
+            version = self.cache.version
+            if self.entry is None or self.entry[0] != version:
+                # A write during the build bumps the version, so an index
+                # built from an older catalog is rebuilt on the next search
+                self.entry = (version, InvertedIndex(connection.execute(text(
+                    "SELECT id, name, description, category FROM movie_prop"
+                ))))
+            return self.entry[1]
+
+    def search(self, connection, terms, category=None, limit=20, offset=0):
+        index = self.index(connection)
+        scores = index.scores(terms)
+        facets = dict(Counter(index.categories[prop_id] for prop_id in scores))
+        if category:
+            scores = {prop_id: score for prop_id, score in scores.items() if index.categories[prop_id] == category}
+        ranked = sorted(scores, key=lambda prop_id: (-scores[prop_id], prop_id))
+        return ranked[offset:offset + limit], len(ranked), facets
+
+SEARCH_BACKENDS = {
+    'fts5': Fts5SearchBackend,
+    'postgres': PostgresSearchBackend,
+    'memory': MemorySearchBackend
+}
+
+def default_search_backend(dialect):
+    if dialect == 'postgresql':
+        return 'postgres'
+    if dialect == 'sqlite':
+        import sqlite3
+        try:
+            sqlite3.connect(':memory:').execute("CREATE VIRTUAL TABLE fts5_check USING fts5(value)")
+            return 'fts5'
+        except sqlite3.OperationalError:
+            pass
+    return 'memory'
+
+def create_search_backend(backend, **options):
+    if backend not in SEARCH_BACKENDS:
+        raise ValueError(f"Unknown search backend: {backend}")
+    return SEARCH_BACKENDS[backend](**options)
@@ -0,0 +1,68 @@
+import os
+import sys
+import tempfile
+
+import pytest
+from sqlalchemy import event
+
+# The app reads its configuration at import time, so the test environment is
+# set up before it is imported: a temporary SQLite database and artifact
+# stores, and no background email or image work. Worker processes started by
+# the tests inherit it (and import this module again, so they reuse the
+# directory of the test run).
+test_dir = os.environ.get('MOVIE_PROPS_TEST_DIR') or tempfile.mkdtemp(prefix='movie-props-tests-')
+os.environ['MOVIE_PROPS_TEST_DIR'] = test_dir
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(test_dir, 'test.db')
+os.environ['PDF_STORE_DIR'] = os.path.join(test_dir, 'pdf_store')
+os.environ['IMAGE_STORE_DIR'] = os.path.join(test_dir, 'image_store')
+os.environ['EMAIL_DISPATCHER'] = 'false'
+os.environ['IMAGE_INGEST'] = 'false'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+
+@pytest.fixture
+def app():
+    # A fresh database and empty caches for every test
+    with app_module.app.app_context():
+        app_module.db.drop_all()
+        app_module.db.create_all()
+        for cache in app_module.worker_caches.values():
+            cache.invalidate()
+        yield app_module
+        app_module.db.session.remove()
+
+@pytest.fixture
+def client(app):
+    return app.app.test_client()
+
+@pytest.fixture
+def count_queries(app):
+    # count_queries(fn) -> (statements executed by fn(), result)
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(app.db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    def count(fn):
+        del statements[:]
+        result = fn()
+        return len(statements), result
+
+    yield count
+    event.remove(app.db.engine, 'before_cursor_execute', before_cursor_execute)
+
+def add_props(app, count=1, images=2):
+    # Inserts count props with images and invalidates the catalog caches
+    start = app.MovieProp.query.count()
+    for i in range(start, start + count):
+        prop = app.MovieProp(name=f'Prop {i}', description='A prop', price=10 + i, print_cost=2,
+                             category=f'Category {i % 3}')
+        prop.images = [app.PropImage(image_url=f'https://example.com/{i}/{j}.jpg', order=j) for j in range(images)]
+        app.db.session.add(prop)
+    app.refresh_categories()
+    app.bump_cache_generation('catalog')
+    app.db.session.commit()
+    app.catalog_cache.invalidate()
@@ -0,0 +1,102 @@
+import pytest
+from sqlalchemy import event
+
+from conftest import add_props
+
+# Admin prop edits diff images against the stored rows, and bulk edits are
+# applied in one transaction
+def image_rows(app, prop_id):
+    app.db.session.expire_all()
+    return [(image.id, image.image_url, image.order) for image in app.db.session.get(app.MovieProp, prop_id).images]
+
+def catalog_generation(app):
+    row = app.db.session.get(app.CacheGeneration, 'catalog')
+    return row.value if row else 0
+
+def test_reorder_keeps_image_ids(app, client):
+    add_props(app, 1, images=3)
+    (a, url_a, _), (b, url_b, _), (c, url_c, _) = image_rows(app, 1)
+    response = client.put('/api/admin/props/1', json={'images': [url_c, {'image_url': url_a}, url_b]})
+    assert response.status_code == 200
+    assert image_rows(app, 1) == [(c, url_c, 0), (a, url_a, 1), (b, url_b, 2)]
+    assert [image['id'] for image in response.get_json()['images']] == [c, a, b]
+
+def test_only_added_and_removed_images_are_written(app, client):
+    add_props(app, 1, images=2)
+    (a, url_a, _), (b, url_b, _) = image_rows(app, 1)
+    response = client.put('/api/admin/props/1', json={'images': [url_a, 'https://example.com/new.jpg']})
+    assert response.status_code == 200
+    rows = image_rows(app, 1)
+    assert rows[0] == (a, url_a, 0)
+    assert rows[1][1:] == ('https://example.com/new.jpg', 1)
+    assert b not in [row[0] for row in rows]
+
+def test_unchanged_edit_writes_nothing(app, client):
+    add_props(app, 1, images=2)
+    prop = client.get('/api/props/1').get_json()
+    generation = catalog_generation(app)
+    writes = []
+
+    def record(conn, cursor, statement, *args):
+        if not statement.lstrip().upper().startswith('SELECT'):
+            writes.append(statement)
+
+    event.listen(app.db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.put('/api/admin/props/1', json={
+            'name': prop['name'], 'price': prop['price'],
+            'images': [image['image_url'] for image in prop['images']]
+        })
+    finally:
+        event.remove(app.db.engine, 'before_cursor_execute', record)
+    assert response.status_code == 200
+    assert writes == []
+    assert catalog_generation(app) == generation
+
+@pytest.mark.parametrize('body', [
+    {'images': [5]},
+    {'images': [{'image_url': 5}]},
+    {'images': 'https://example.com/a.jpg'},
+    {'price': 'free'},
+    ['not', 'an', 'object'],
+])
+def test_invalid_edits_are_rejected(app, client, body):
+    add_props(app, 1)
+    before = image_rows(app, 1)
+    assert client.put('/api/admin/props/1', json=body).status_code == 400
+    assert client.post('/api/admin/props/bulk', json={'props': [{'id': 1, **body}] if isinstance(body, dict) else body}).status_code == 400
+    assert image_rows(app, 1) == before
+
+def test_bulk_edit_applies_all_edits_in_one_commit(app, client):
+    add_props(app, 20)
+    generation = catalog_generation(app)
+    edits = [{'id': prop_id, 'price': 500 + prop_id} for prop_id in range(20, 0, -1)]
+    edits[0]['category'] = 'Category 0'  # Prop 20 is in Category 1, now moved
+    edits.append({'id': 1, 'price': 501})  # A repeated id counts once
+    response = client.post('/api/admin/props/bulk', json={'props': edits})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert (data['updated'], data['unchanged']) == (20, 0)
+    assert [prop['id'] for prop in data['props']] == list(range(20, 0, -1))
+    assert catalog_generation(app) == generation + 1
+    assert client.get('/api/props/20').get_json()['price'] == 520
+
+    categories = {category['name']: category['count'] for category in client.get('/api/categories').get_json()}
+    assert categories['Category 0'] == 8
+
+def test_bulk_edit_rolls_back_on_invalid_edit(app, client):
+    add_props(app, 3)
+    response = client.post('/api/admin/props/bulk', json={'props': [
+        {'id': 1, 'price': 99}, {'id': 2, 'images': [5]}
+    ]})
+    assert response.status_code == 400
+    assert client.post('/api/admin/props/bulk', json={'props': [{'id': 1, 'price': 99}, {'id': 404}]}).status_code == 404
+    app.db.session.expire_all()
+    assert app.db.session.get(app.MovieProp, 1).price == 10
+
+def test_bulk_edit_without_changes_writes_nothing(app, client):
+    add_props(app, 2)
+    generation = catalog_generation(app)
+    response = client.post('/api/admin/props/bulk', json={'props': [{'id': 1, 'price': 10}, {'id': 2}]})
+    assert response.get_json()['unchanged'] == 2
+    assert catalog_generation(app) == generation
@@ -0,0 +1,51 @@
+import multiprocessing
+
+from conftest import add_props
+
+# Two worker processes share the database, as gunicorn workers do. A write in
+# one has to be visible in the other's next read, although both cache the
+# catalog in memory.
+def worker(requests, responses):
+    import app as app_module
+    client = app_module.app.test_client()
+    for method, url, body in iter(requests.get, None):
+        response = client.open(url, method=method, json=body)
+        responses.put((response.status_code, response.get_json()))
+
+class Worker:
+    def __init__(self, context):
+        self.requests = context.Queue()
+        self.responses = context.Queue()
+        self.process = context.Process(target=worker, args=(self.requests, self.responses))
+        self.process.start()
+
+    def call(self, method, url, body=None):
+        self.requests.put((method, url, body))
+        return self.responses.get(timeout=60)
+
+    def stop(self):
+        self.requests.put(None)
+        self.process.join(timeout=60)
+
+def test_write_in_one_worker_is_visible_in_the_other(app):
+    add_props(app, 1)
+    context = multiprocessing.get_context('spawn')
+    reader, writer = Worker(context), Worker(context)
+    try:
+        # Both workers cache the prop, the listing and the settings
+        for worker_process in (reader, writer):
+            assert worker_process.call('GET', '/api/props/1')[1]['name'] == 'Prop 0'
+            assert worker_process.call('GET', '/api/props')[1][0]['name'] == 'Prop 0'
+            worker_process.call('GET', '/api/discount-settings')
+
+        assert writer.call('PUT', '/api/admin/props/1', {'name': 'Edited'})[0] == 200
+        assert reader.call('GET', '/api/props/1')[1]['name'] == 'Edited'
+        assert reader.call('GET', '/api/props')[1][0]['name'] == 'Edited'
+
+        settings = writer.call('GET', '/api/discount-settings')[1]
+        settings['tier1_discount'] = 0.15
+        assert writer.call('PUT', '/api/admin/discount-settings', settings)[0] == 200
+        assert reader.call('GET', '/api/discount-settings')[1]['tier1_discount'] == 0.15
+    finally:
+        reader.stop()
+        writer.stop()
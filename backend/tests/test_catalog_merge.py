@@ -0,0 +1,92 @@
+import json
+
+import pytest
+from sqlalchemy import event
+
+from conftest import add_props
+
+# Merge imports match props by name and only write what changed
+def exported(client):
+    return json.loads(client.get('/api/admin/export').get_data())
+
+def merge(app, client, props):
+    body = json.dumps({'schema_version': app.CURRENT_DB_VERSION, 'props': props})
+    response = client.post('/api/admin/import?mode=merge', data=body, content_type='application/json')
+    assert response.status_code == 200, response.get_json()
+    counts = response.get_json()
+    del counts['message']
+    return counts
+
+def catalog(app):
+    app.db.session.expire_all()
+    return {prop.id: (prop.name, prop.price, [image.image_url for image in prop.images])
+            for prop in app.MovieProp.query.order_by(app.MovieProp.id)}
+
+def upload(client):
+    return [{key: value for key, value in prop.items() if key != 'id'} for prop in exported(client)['props']]
+
+@pytest.fixture(params=[1, 1000], ids=['batch-1', 'batch-default'])
+def batch_size(request, app, monkeypatch):
+    monkeypatch.setattr(app, 'IMPORT_BATCH_SIZE', request.param)
+    return request.param
+
+def test_unchanged_merge_writes_nothing(app, client, batch_size):
+    add_props(app, 5)
+    props = upload(client)
+    generation = app.db.session.get(app.CacheGeneration, 'catalog').value
+    writes = []
+
+    def record(conn, cursor, statement, *args):
+        if not statement.lstrip().upper().startswith('SELECT'):
+            writes.append(statement)
+
+    event.listen(app.db.engine, 'before_cursor_execute', record)
+    try:
+        counts = merge(app, client, props)
+    finally:
+        event.remove(app.db.engine, 'before_cursor_execute', record)
+    assert counts == {'imported': 5, 'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 5}
+    assert writes == []
+    app.db.session.expire_all()
+    assert app.db.session.get(app.CacheGeneration, 'catalog').value == generation
+
+def test_inserts_updates_and_deletes_keep_ids(app, client, batch_size):
+    add_props(app, 5)
+    before = catalog(app)
+    props = upload(client)
+    props[0]['price'] = 99.5                               # Field change
+    props[1]['images'] = list(reversed(props[1]['images']))  # Image order change
+    props[2]['images'].append('https://example.com/new.jpg')
+    del props[3]                                           # Removed
+    props.append({**props[0], 'name': 'New prop', 'images': ['https://example.com/n.jpg']})
+
+    counts = merge(app, client, props)
+    assert counts == {'imported': 5, 'inserted': 1, 'updated': 3, 'deleted': 1, 'unchanged': 1}
+
+    after = catalog(app)
+    assert sorted(after) == [1, 2, 3, 5, 6]
+    assert after[1] == ('Prop 0', 99.5, before[1][2])
+    assert after[2][2] == list(reversed(before[2][2]))
+    assert after[3][2] == before[3][2] + ['https://example.com/new.jpg']
+    assert after[5] == before[5]
+    assert after[6] == ('New prop', 99.5, ['https://example.com/n.jpg'])
+
+    # Merging the same upload again changes nothing
+    assert merge(app, client, props)['unchanged'] == 5
+
+def test_duplicate_names_pair_up_in_id_order(app, client, batch_size):
+    for price in (1, 2):
+        app.db.session.add(app.MovieProp(name='Dup', description='d', price=price, print_cost=0, category='A'))
+    app.db.session.commit()
+    prop = {'name': 'Dup', 'description': 'd', 'print_cost': 0, 'category': 'A', 'images': []}
+
+    counts = merge(app, client, [{**prop, 'price': 10}, {**prop, 'price': 20}, {**prop, 'price': 30}, {**prop, 'price': 40}])
+    assert counts == {'imported': 4, 'inserted': 2, 'updated': 2, 'deleted': 0, 'unchanged': 0}
+    assert [price for _, price, _ in catalog(app).values()] == [10, 20, 30, 40]
+    assert sorted(catalog(app)) == [1, 2, 3, 4]
+
+    counts = merge(app, client, [{**prop, 'price': 10}, {**prop, 'price': 20}, {**prop, 'price': 30}, {**prop, 'price': 40}])
+    assert counts['unchanged'] == 4
+    counts = merge(app, client, [{**prop, 'price': 10}])
+    assert (counts['unchanged'], counts['deleted']) == (1, 3)
+    assert list(catalog(app)) == [1]
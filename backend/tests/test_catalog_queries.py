@@ -0,0 +1,26 @@
+from conftest import add_props
+
+# Catalog endpoints load props and their images in a fixed number of queries,
+# however many props there are
+CATALOG_URLS = ['/api/props', '/api/props/1', '/api/admin/export']
+
+def catalog_query_counts(app, client, count_queries):
+    counts = {}
+    for url in CATALOG_URLS:
+        app.catalog_cache.invalidate()
+        count, _ = count_queries(lambda: client.get(url).get_data())
+        counts[url] = count
+    return counts
+
+def test_query_count_is_constant_as_catalog_grows(app, client, count_queries):
+    add_props(app, 5)
+    small = catalog_query_counts(app, client, count_queries)
+    add_props(app, 50)
+    large = catalog_query_counts(app, client, count_queries)
+    assert large == small
+
+def test_catalog_includes_images(app, client):
+    add_props(app, 3)
+    props = client.get('/api/props').get_json()
+    assert len(props) == 3
+    assert [image['order'] for image in props[0]['images']] == [0, 1]
@@ -0,0 +1,103 @@
+import socket
+from datetime import datetime, timedelta
+from email import message_from_bytes
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from conftest import add_props
+
+# The email outbox against a local SMTP server
+class Inbox:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.mail_from, message_from_bytes(envelope.content)))
+        return '250 OK'
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+@pytest.fixture
+def smtp_server():
+    inbox = Inbox()
+    controller = Controller(inbox, hostname='127.0.0.1', port=free_port())
+    controller.start()
+    inbox.controller = controller
+    yield inbox
+    controller.stop()
+
+def configure_email(app, port, username=''):
+    app.db.session.add(app.EmailSettings(
+        notification_email='prints@example.com', smtp_server='127.0.0.1', smtp_port=port,
+        smtp_username=username, smtp_password='', smtp_use_tls=False
+    ))
+    app.bump_cache_generation('settings')
+    app.db.session.commit()
+    app.settings_cache.invalidate()
+
+def checkout(client, printed=True):
+    response = client.post('/api/generate-invoice', json={'items': [{'id': 1, 'quantity': 1, 'printedVersion': printed}]})
+    assert response.status_code == 200
+
+def test_checkout_enqueues_and_dispatch_sends(app, client, smtp_server):
+    add_props(app)
+    configure_email(app, smtp_server.controller.port)
+    checkout(client, printed=False)
+    assert app.EmailOutbox.query.count() == 0
+
+    checkout(client)
+    message = app.EmailOutbox.query.one()
+    assert message.status == 'pending'
+    assert smtp_server.messages == []
+
+    assert app.dispatch_outbox() == 1
+    app.outbox_sender.close()
+    mail_from, sent = smtp_server.messages[0]
+    # No SMTP login, so the notification address is the sender
+    assert mail_from == 'prints@example.com'
+    assert sent['To'] == 'prints@example.com'
+    assert sent['Subject'] == f'New print order {app.Order.query.order_by(app.Order.id.desc()).first().invoice_number}'
+    assert app.db.session.get(app.EmailOutbox, message.id).status == 'sent'
+    assert app.dispatch_outbox() == 0
+
+def test_failed_sends_back_off_and_give_up(app, client, monkeypatch):
+    monkeypatch.setattr(app, 'OUTBOX_MAX_ATTEMPTS', 2)
+    add_props(app)
+    configure_email(app, free_port())  # Nothing listens there
+    checkout(client)
+
+    assert app.dispatch_outbox() == 1
+    message = app.EmailOutbox.query.one()
+    assert (message.status, message.attempts) == ('pending', 1)
+    assert message.next_attempt_at > datetime.utcnow() + timedelta(seconds=20)
+    assert message.last_error
+
+    # Not due yet
+    assert app.dispatch_outbox() == 0
+
+    message.next_attempt_at = datetime.utcnow()
+    app.db.session.commit()
+    assert app.dispatch_outbox() == 1
+    message = app.EmailOutbox.query.one()
+    assert (message.status, message.attempts) == ('failed', 2)
+
+def test_messages_are_claimed_once(app):
+    for i in range(3):
+        app.db.session.add(app.EmailOutbox(recipient='prints@example.com', subject=f'Order {i}', body=''))
+    app.db.session.commit()
+
+    first = [message.id for message in app.claim_outbox_messages()]
+    assert len(first) == 3
+    assert app.claim_outbox_messages() == []
+
+    # Claims of a dispatcher that died mid-send are taken over after the timeout
+    app.db.session.query(app.EmailOutbox).update(
+        {'claimed_at': datetime.utcnow() - app.OUTBOX_CLAIM_TIMEOUT - timedelta(seconds=1)}
+    )
+    app.db.session.commit()
+    assert [message.id for message in app.claim_outbox_messages()] == first
+    assert app.claim_outbox_messages() == []
@@ -0,0 +1,42 @@
+import tracemalloc
+
+from sqlalchemy import insert
+
+# The streaming export reads the catalog in batches, so its peak memory stays
+# flat as the catalog grows instead of scaling with the response size
+def add_catalog(app, count):
+    start = app.MovieProp.query.count()
+    app.db.session.execute(insert(app.MovieProp.__table__), [
+        {'id': i, 'name': f'Prop {i}', 'description': 'A prop ' * 10, 'price': 10 + i % 90,
+         'print_cost': 2, 'category': f'Category {i % 12}'}
+        for i in range(start + 1, start + count + 1)
+    ])
+    app.db.session.execute(insert(app.PropImage.__table__), [
+        {'prop_id': i, 'image_url': f'https://example.com/{i}/{j}.jpg', 'order': j}
+        for i in range(start + 1, start + count + 1) for j in range(2)
+    ])
+    app.db.session.commit()
+    app.catalog_cache.invalidate()
+
+def export_peak_memory(client, url):
+    # Returns (peak traced bytes, response size)
+    tracemalloc.start()
+    try:
+        response = client.get(url)
+        size = sum(len(chunk) for chunk in response.response)
+        response.close()
+        return tracemalloc.get_traced_memory()[1], size
+    finally:
+        tracemalloc.stop()
+
+def test_export_memory_stays_flat_as_catalog_grows(app, client):
+    for url in ('/api/admin/export', '/api/admin/export?format=ndjson'):
+        app.db.session.execute(app.PropImage.__table__.delete())
+        app.db.session.execute(app.MovieProp.__table__.delete())
+        add_catalog(app, 2000)
+        small_peak, small_size = export_peak_memory(client, url)
+        add_catalog(app, 18000)
+        large_peak, large_size = export_peak_memory(client, url)
+
+        assert large_size > 9 * small_size
+        assert large_peak < 1.5 * small_peak
@@ -0,0 +1,114 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from image_variants import check_image_url, fetch_image
+
+from conftest import add_props
+
+# Image ingestion against a local HTTP origin standing in for the image host
+def jpeg(size=(1600, 1000)):
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+class OriginHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        port = self.server.server_address[1]
+        if self.path == '/prop.jpg':
+            self.respond(200, 'image/jpeg', self.server.image)
+        elif self.path == '/redirect':
+            self.send_response(302)
+            self.send_header('Location', f'http://localhost:{port}/prop.jpg')
+            self.end_headers()
+        elif self.path == '/page':
+            self.respond(200, 'text/html', b'<html></html>')
+        else:
+            self.respond(404, 'text/plain', b'not found')
+
+    def respond(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def origin():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), OriginHandler)
+    server.image = jpeg()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+@pytest.mark.parametrize('url', [
+    'http://127.0.0.1/prop.jpg',
+    'http://localhost/prop.jpg',
+    'http://10.0.0.5/prop.jpg',
+    'http://192.168.1.10/prop.jpg',
+    'http://169.254.169.254/latest/meta-data',
+    'http://[::1]/prop.jpg',
+    'http://0.0.0.0/prop.jpg',
+    'file:///etc/passwd',
+])
+def test_internal_urls_are_rejected(url):
+    with pytest.raises(ValueError):
+        check_image_url(url)
+
+def test_loopback_origin_is_rejected_unless_allowed(origin):
+    with pytest.raises(ValueError):
+        fetch_image(f'{origin}/prop.jpg')
+    data, content_type = fetch_image(f'{origin}/prop.jpg', allowed_hosts={'127.0.0.1'})
+    assert content_type == 'image/jpeg'
+    assert data.startswith(b'\xff\xd8')
+
+def test_redirect_targets_are_checked(origin):
+    # The origin is allowed, the redirect target (localhost) is not
+    with pytest.raises(ValueError):
+        fetch_image(f'{origin}/redirect', allowed_hosts={'127.0.0.1'})
+    data, _ = fetch_image(f'{origin}/redirect', allowed_hosts={'127.0.0.1', 'localhost'})
+    assert data.startswith(b'\xff\xd8')
+
+def test_non_images_and_large_images_are_rejected(origin):
+    with pytest.raises(ValueError):
+        fetch_image(f'{origin}/page', allowed_hosts={'127.0.0.1'})
+    with pytest.raises(ValueError):
+        fetch_image(f'{origin}/prop.jpg', max_bytes=100, allowed_hosts={'127.0.0.1'})
+
+def test_ingest_stores_resized_variants(app, client, origin, monkeypatch):
+    monkeypatch.setattr(app, 'IMAGE_ALLOWED_HOSTS', {'127.0.0.1'})
+    response = client.post('/api/admin/props', json={
+        'name': 'Lightsaber', 'description': 'A prop', 'price': 100, 'print_cost': 5,
+        'category': 'Weapons', 'images': [f'{origin}/prop.jpg']
+    })
+    assert response.status_code == 200
+    image = response.get_json()['images'][0]
+    app.ingest_images([image['id']])
+
+    expected = {'thumb': ('image/jpeg', (480, 320)), 'thumb.webp': ('image/webp', (480, 320)),
+                'large': ('image/jpeg', (1200, 750)), 'large.webp': ('image/webp', (1200, 750)),
+                'original': ('image/jpeg', (1600, 1000))}
+    for variant, (content_type, size) in expected.items():
+        response = client.get(f"/api/images/{image['id']}/{variant}?v={image['version']}")
+        assert response.status_code == 200
+        assert response.mimetype == content_type
+        with Image.open(BytesIO(response.data)) as stored:
+            assert stored.size == size
+        response.close()
+
+def test_internal_image_is_not_stored(app, client, origin):
+    add_props(app, 1, images=0)
+    response = client.put('/api/admin/props/1', json={'images': [f'{origin}/prop.jpg']})
+    image_id = response.get_json()['images'][0]['id']
+    app.ingest_images([image_id])
+    assert app.ImageVariant.query.count() == 0
+    # The image is not copied, the browser is sent to the source instead
+    assert client.get(f'/api/images/{image_id}/thumb').status_code == 302
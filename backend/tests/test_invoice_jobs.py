@@ -0,0 +1,47 @@
+import time
+from datetime import datetime, timedelta
+
+from conftest import add_props
+
+# A job whose worker went away before rendering it is queued again when it is
+# polled after INVOICE_JOB_TIMEOUT
+def wait_for_job(app, client, job_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        # Requests share the test's session, drop what it loaded before
+        app.db.session.expire_all()
+        job = client.get(f'/api/invoice-jobs/{job_id}').get_json()
+        if job['status'] != 'pending':
+            return job
+        time.sleep(0.1)
+    raise AssertionError(f'Invoice job {job_id} still pending')
+
+def test_stale_pending_job_is_rendered_when_polled(app, client, monkeypatch):
+    add_props(app, 2)
+    # The worker dies before the job runs
+    monkeypatch.setattr(app.invoice_executor, 'submit', lambda *args: None)
+    response = client.post('/api/generate-invoice?async=true', json={
+        'items': [{'id': 1, 'quantity': 2, 'printedVersion': True}, {'id': 2, 'quantity': 1}]
+    })
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    monkeypatch.undo()
+
+    # Not yet timed out
+    assert client.get(f'/api/invoice-jobs/{job_id}').get_json()['status'] == 'pending'
+
+    job = app.db.session.get(app.InvoiceJob, job_id)
+    job.created_at = datetime.utcnow() - timedelta(seconds=app.INVOICE_JOB_TIMEOUT + 1)
+    app.db.session.commit()
+
+    assert wait_for_job(app, client, job_id)['status'] == 'done'
+    response = client.get(f'/api/invoice-jobs/{job_id}/pdf')
+    assert response.status_code == 200
+    assert response.data.startswith(b'%PDF')
+
+def test_stale_job_without_order_fails(app, client):
+    app.db.session.add(app.InvoiceJob(id='orphan', invoice_number='202401-0001',
+                                      created_at=datetime.utcnow() - timedelta(days=1)))
+    app.db.session.commit()
+    assert client.get('/api/invoice-jobs/orphan').get_json()['status'] == 'failed'
+    assert client.get('/api/invoice-jobs/orphan/pdf').status_code == 500
@@ -0,0 +1,50 @@
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+from conftest import add_props
+
+PROCESSES = 3
+THREADS = 4
+CHECKOUTS_PER_PROCESS = 12
+
+# Parallel checkouts in several processes (and threads per process) must
+# never be handed the same invoice number
+def checkout_worker(count, results):
+    import app as app_module
+    client = app_module.app.test_client()
+
+    def checkout(_):
+        response = client.post('/api/generate-invoice', json={'items': [{'id': 1, 'quantity': 1}]})
+        return response.status_code
+
+    with ThreadPoolExecutor(THREADS) as executor:
+        results.put(list(executor.map(checkout, range(count))))
+
+@pytest.mark.parametrize('block', [1, 5])
+def test_parallel_checkouts_get_distinct_invoice_numbers(app, monkeypatch, block):
+    monkeypatch.setenv('INVOICE_NUMBER_BLOCK', str(block))
+    add_props(app, 1)
+    # An order issued before the month's counter row existed
+    year_month = datetime.now().strftime('%Y%m')
+    app.db.session.add(app.Order(invoice_number=f'{year_month}-0007', total_amount=1))
+    app.db.session.commit()
+
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = [context.Process(target=checkout_worker, args=(CHECKOUTS_PER_PROCESS, results))
+                 for _ in range(PROCESSES)]
+    for process in processes:
+        process.start()
+    statuses = sum((results.get(timeout=120) for _ in processes), [])
+    for process in processes:
+        process.join(timeout=60)
+
+    assert statuses == [200] * PROCESSES * CHECKOUTS_PER_PROCESS
+    app.db.session.expire_all()
+    numbers = [number for number, in app.db.session.query(app.Order.invoice_number)]
+    assert len(numbers) == PROCESSES * CHECKOUTS_PER_PROCESS + 1
+    assert len(set(numbers)) == len(numbers)
+    assert min(numbers) == f'{year_month}-0007'
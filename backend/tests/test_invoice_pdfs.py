@@ -0,0 +1,38 @@
+import shutil
+
+from conftest import add_props
+
+# Invoices are kept as long as their order: a PDF evicted from the artifact
+# store is rendered again from the order lines
+def test_evicted_invoice_is_rendered_again(app, client):
+    add_props(app, 2)
+    response = client.post('/api/generate-invoice', json={'items': [{'id': 1, 'quantity': 2, 'printedVersion': True}]})
+    assert response.status_code == 200
+    invoice_number = app.Order.query.one().invoice_number
+
+    shutil.rmtree(app.pdf_store.root)
+    response = client.get(f'/api/invoices/{invoice_number}/pdf')
+    assert response.status_code == 200
+    assert response.data.startswith(b'%PDF')
+    assert response.headers['X-Filename'] == f'invoice_{invoice_number}.pdf'
+
+    # Stored again, the next download is served from the store
+    record = app.StoredPdf.query.filter_by(kind='invoice', reference=invoice_number).one()
+    stream = app.pdf_store.open(record.digest)
+    assert stream is not None
+    stream.close()
+
+def test_evicted_large_invoice_is_rendered_again(app, client):
+    add_props(app, 1)
+    items = [{'id': 1, 'quantity': 1}] * (app.LARGE_ORDER_LINES + 1)
+    assert client.post('/api/generate-invoice', json={'items': items}).status_code == 200
+    invoice_number = app.Order.query.one().invoice_number
+
+    shutil.rmtree(app.pdf_store.root)
+    response = client.get(f'/api/invoices/{invoice_number}/pdf')
+    assert response.status_code == 200
+    assert response.data.startswith(b'%PDF')
+    response.close()
+
+def test_unknown_invoice_is_not_found(app, client):
+    assert client.get('/api/invoices/202401-9999/pdf').status_code == 404
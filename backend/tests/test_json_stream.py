@@ -0,0 +1,112 @@
+import io
+import json
+
+import pytest
+
+import json_stream
+from json_stream import iter_json_members, iter_ndjson
+
+from conftest import add_props
+
+# The incremental parser with chunk sizes small enough that keys, numbers,
+# strings and multi-byte characters straddle chunk boundaries
+DOCUMENT = {
+    'schema_version': '1.1',
+    'export_date': '2024-01-01T00:00:00',
+    'props': [
+        {'name': 'Lichtschwert ✨', 'description': 'Café 🎬 "quoted" \\ back', 'price': 1234567.25,
+         'print_cost': 0, 'category': 'Sci-Fi', 'images': ['https://example.com/a.jpg']},
+        {'name': 'Ring', 'description': '', 'price': 10, 'print_cost': 1e-3, 'category': 'Fantasy',
+         'images': [], 'extra': {'nested': [1, [2, {'three': None}]], 'flag': True}},
+    ],
+    'count': 123456789
+}
+
+def members(data, chunk_size, stream_keys=('props',)):
+    result = {}
+    for key, value in iter_json_members(io.BytesIO(data), stream_keys, chunk_size=chunk_size):
+        result[key] = list(value) if key in stream_keys else value
+    return result
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 5, 7, 64])
+@pytest.mark.parametrize('indent', [None, 2])
+def test_members_match_json_loads(chunk_size, indent):
+    data = json.dumps(DOCUMENT, indent=indent, ensure_ascii=False).encode('utf-8')
+    assert members(data, chunk_size) == json.loads(data)
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3])
+def test_number_at_chunk_end_is_not_truncated(chunk_size):
+    assert members(b'{"a": 12345, "b": [1.5e10]}', chunk_size, ()) == {'a': 12345, 'b': [1.5e10]}
+    assert members(b'{"n": 12345}', chunk_size, ()) == {'n': 12345}
+
+def test_elements_are_streamed():
+    data = json.dumps({'props': [{'i': i} for i in range(5)], 'after': 1}).encode()
+    stream = iter_json_members(io.BytesIO(data), ('props',), chunk_size=4)
+    key, elements = next(stream)
+    assert key == 'props'
+    assert next(elements) == {'i': 0}
+    # Unconsumed elements are skipped when the next member is read
+    assert next(stream) == ('after', 1)
+
+@pytest.mark.parametrize('data', [
+    b'',
+    b'[]',
+    b'{"a": 1',
+    b'{"a": 1,}',
+    b'{"a" 1}',
+    b'{"a": 1} x',
+    b'{"props": {}}',
+    b'{"props": [1 2]}',
+    b'{"a": 12',
+    b'{"a": "unterminated}',
+    b'{1: 2}',
+])
+def test_malformed_documents_are_rejected(data):
+    with pytest.raises(ValueError):
+        members(data, 3)
+
+def test_value_size_is_bounded(monkeypatch):
+    monkeypatch.setattr(json_stream, 'MAX_VALUE_SIZE', 100)
+    data = json.dumps({'props': [{'description': 'x' * 1000}]}).encode()
+    with pytest.raises(ValueError, match='too large'):
+        members(data, 16)
+    assert members(json.dumps({'props': [{'d': 'x' * 50}]}).encode(), 16) == {'props': [{'d': 'x' * 50}]}
+
+def test_invalid_utf8_is_rejected():
+    with pytest.raises(ValueError):
+        members(b'{"a": "\xff\xfe"}', 2)
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 8, 64])
+def test_ndjson_lines_across_chunks(chunk_size):
+    lines = [{'schema_version': '1.1'}, {'name': 'Café 🎬'}, {'price': 12345}]
+    data = ('\n'.join(json.dumps(line, ensure_ascii=False) for line in lines) + '\n\n  \n').encode('utf-8')
+    assert list(iter_ndjson(io.BytesIO(data), chunk_size)) == lines
+    # Without a final newline
+    assert list(iter_ndjson(io.BytesIO(data.rstrip()), chunk_size)) == lines
+
+def test_ndjson_errors_name_the_line(monkeypatch):
+    with pytest.raises(ValueError, match='line 3'):
+        list(iter_ndjson(io.BytesIO(b'{}\n{}\n{nope\n'), 4))
+    monkeypatch.setattr(json_stream, 'MAX_VALUE_SIZE', 100)
+    with pytest.raises(ValueError, match='too long'):
+        list(iter_ndjson(io.BytesIO(b'{"a": "' + b'x' * 1000 + b'"}\n'), 16))
+
+# Exported catalogs import back unchanged, as JSON and as NDJSON
+def exported_props(client, export_format):
+    data = client.get(f'/api/admin/export?format={export_format}').get_data()
+    if export_format == 'json':
+        return json.loads(data)['props']
+    return [json.loads(line) for line in data.splitlines()[1:]]
+
+@pytest.mark.parametrize('export_format, content_type', [('json', 'application/json'), ('ndjson', 'application/x-ndjson')])
+def test_import_round_trip(app, client, monkeypatch, export_format, content_type):
+    monkeypatch.setattr(app, 'IMPORT_BATCH_SIZE', 3)
+    add_props(app, 10)
+    before = exported_props(client, export_format)
+    body = client.get(f'/api/admin/export?format={export_format}').get_data()
+    # Replaces the catalog with the exported copy
+
+    response = client.post('/api/admin/import', data=body, content_type=content_type)
+    assert response.status_code == 200
+    assert response.get_json()['imported'] == 10
+    assert exported_props(client, export_format) == before
@@ -0,0 +1,67 @@
+import pytest
+
+from conftest import add_props
+
+# Carts are priced on the server from the catalog and the discount tiers;
+# prices sent by the client are ignored
+@pytest.fixture
+def catalog(app):
+    add_props(app, 2)  # Prop 1: price 10, print cost 2; prop 2: price 11
+    app.db.session.add(app.DiscountSettings(tier1_quantity=5, tier1_discount=0.1, tier2_quantity=10, tier2_discount=0.2))
+    app.bump_cache_generation('settings')
+    app.db.session.commit()
+    app.settings_cache.invalidate()
+    return app
+
+def quote(client, items):
+    return client.post('/api/quote', json={'items': items})
+
+@pytest.mark.parametrize('quantity, discount_percent', [(1, 0), (4, 0), (5, 0.1), (9, 0.1), (10, 0.2), (30, 0.2)])
+def test_discount_tier_follows_total_quantity(catalog, client, quantity, discount_percent):
+    data = quote(client, [{'id': 1, 'quantity': quantity - 1}, {'id': 2, 'quantity': 1}] if quantity > 1
+                 else [{'id': 2, 'quantity': 1}]).get_json()
+    assert data['total_quantity'] == quantity
+    assert data['discount_percent'] == discount_percent
+    total = data['subtotal'] + data['total_print_cost']
+    assert data['discount_amount'] == pytest.approx(total * discount_percent)
+    assert data['final_total'] == pytest.approx(total - data['discount_amount'])
+
+def test_print_cost_only_applies_to_printed_lines(catalog, client):
+    data = quote(client, [
+        {'id': 1, 'quantity': 2, 'printedVersion': True, 'price': 0.01},
+        {'id': 1, 'quantity': 1},
+        {'id': 2, 'quantity': 1, 'printedVersion': False, 'print_cost': 100}
+    ]).get_json()
+    printed, unprinted, other = data['items']
+    assert (printed['price'], printed['print_cost'], printed['line_total']) == (10, 2, 24)
+    assert (unprinted['print_cost'], unprinted['line_total']) == (0, 10)
+    assert (other['price'], other['print_cost'], other['line_total']) == (11, 0, 11)
+    assert data['subtotal'] == 41
+    assert data['total_print_cost'] == 4
+
+@pytest.mark.parametrize('body', [
+    {'items': []},
+    {'items': [{'id': 99}]},
+    {'items': [{'id': True}]},
+    {'items': [{'id': '1'}]},
+    {'items': [{'id': 1, 'quantity': 0}]},
+    {'items': [{'id': 1, 'quantity': 1.5}]},
+    {'items': [{'id': 1, 'quantity': True}]},
+    {'items': [1]},
+    {'items': {'id': 1}},
+    [{'id': 1}],
+])
+def test_invalid_carts_are_rejected(catalog, client, body):
+    assert client.post('/api/quote', json=body).status_code == 400
+    assert client.post('/api/generate-invoice', json=body).status_code == 400
+    assert catalog.Order.query.count() == 0
+
+def test_price_table_survives_cache_churn_and_follows_writes(catalog, client, count_queries):
+    quote(client, [{'id': 1}])
+    for i in range(catalog.catalog_cache.max_entries * 2):
+        catalog.catalog_cache.set(('props', i), b'page')
+    count, _ = count_queries(lambda: catalog.get_price_table())
+    assert count == 0
+
+    assert client.put('/api/admin/props/1', json={'price': 15}).status_code == 200
+    assert quote(client, [{'id': 1}]).get_json()['subtotal'] == 15
@@ -0,0 +1,21 @@
+from search_index import MemorySearchBackend
+
+from conftest import add_props
+
+# The in-memory index survives LRU churn in the catalog cache and is rebuilt
+# once the catalog changes
+def test_memory_index_is_kept_outside_the_lru(app):
+    add_props(app, 3)
+    backend = MemorySearchBackend(cache=app.catalog_cache)
+    connection = app.db.session.connection()
+    ids, total, _ = backend.search(connection, ['prop'])
+    assert total == 3
+    index = backend.index(connection)
+
+    for i in range(app.catalog_cache.max_entries * 2):
+        app.catalog_cache.set(('props', i), b'page')
+    assert backend.index(connection) is index
+
+    add_props(app, 1)
+    assert backend.index(app.db.session.connection()) is not index
+    assert backend.search(app.db.session.connection(), ['prop'])[1] == 4
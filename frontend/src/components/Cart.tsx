@@ -16,70 +16,66 @@ import DeleteIcon from '@mui/icons-material/Delete';
 import { useCart } from '../context/CartContext';
 import { API_BASE_URL } from '../config';
 
+interface Quote {
+  subtotal: number;
+  total_print_cost: number;
+  discount_percent: number;
+  discount_amount: number;
+  final_total: number;
+}
+
+const emptyQuote: Quote = {
+  subtotal: 0,
+  total_print_cost: 0,
+  discount_percent: 0,
+  discount_amount: 0,
+  final_total: 0,
+};
+
 const Cart: React.FC = () => {
   const { items, removeFromCart, clearCart } = useCart();
-  const [discountSettings, setDiscountSettings] = useState({
-    tier1_quantity: 5,
-    tier1_discount: 0.05,
-    tier2_quantity: 10,
-    tier2_discount: 0.10,
-  });
+  const [quote, setQuote] = useState<Quote>(emptyQuote);
+
+  // Cart lines sent to the server, which resolves prices and discounts itself
+  const cartLines = () => items.map(item => ({
+    id: item.prop.id,
+    quantity: item.quantity,
+    printedVersion: item.printedVersion
+  }));
 
   useEffect(() => {
-    fetchDiscountSettings();
-  }, []);
+    if (items.length === 0) {
+      setQuote(emptyQuote);
+      return;
+    }
+    fetchQuote();
+  }, [items]);
 
-  const fetchDiscountSettings = async () => {
+  const fetchQuote = async () => {
     try {
-      const response = await fetch(`${API_BASE_URL}/api/discount-settings`);
-      if (!response.ok) throw new Error('Failed to fetch discount settings');
+      const response = await fetch(`${API_BASE_URL}/api/quote`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ items: cartLines() }),
+      });
+      if (!response.ok) throw new Error('Failed to fetch quote');
       const data = await response.json();
-      setDiscountSettings(data);
+      setQuote(data);
     } catch (error) {
-      console.error('Error fetching discount settings:', error);
+      console.error('Error fetching quote:', error);
     }
   };
 
-  const calculateTotals = () => {
-    const totalItems = items.reduce((acc, item) => acc + item.quantity, 0);
-    const discountPercent = totalItems >= discountSettings.tier2_quantity 
-      ? discountSettings.tier2_discount 
-      : totalItems >= discountSettings.tier1_quantity 
-        ? discountSettings.tier1_discount 
-        : 0;
-    
-    const totals = items.reduce(
-      (acc, item) => {
-        acc.subtotal += item.prop.price * item.quantity;
-        acc.printCost += item.printedVersion ? (item.prop.print_cost || 0) * item.quantity : 0;
-        return acc;
-      },
-      { subtotal: 0, printCost: 0, total: 0, discountPercent, discountAmount: 0 }
-    );
-    
-    totals.discountAmount = (totals.subtotal + totals.printCost) * totals.discountPercent;
-    totals.total = totals.subtotal + totals.printCost - totals.discountAmount;
-    
-    return totals;
-  };
-
   const handleCheckout = async () => {
     try {
-      const { discountPercent } = calculateTotals();
       const response = await fetch(`${API_BASE_URL}/api/generate-invoice`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({
-          items: items.map(item => ({
-            ...item.prop,
-            quantity: item.quantity,
-            printedVersion: item.printedVersion,
-            print_cost: item.printedVersion ? item.prop.print_cost : 0
-          })),
-          discountPercent: discountPercent
-        }),
+        body: JSON.stringify({ items: cartLines() }),
       });
 
       if (!response.ok) {
@@ -110,7 +106,13 @@ const Cart: React.FC = () => {
     }
   };
 
-  const { subtotal, printCost, total, discountPercent, discountAmount } = calculateTotals();
+  const {
+    subtotal,
+    total_print_cost: printCost,
+    final_total: total,
+    discount_percent: discountPercent,
+    discount_amount: discountAmount,
+  } = quote;
 
   return (
     <Box sx={{ 
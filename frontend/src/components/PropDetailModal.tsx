@@ -11,6 +11,7 @@ import {
 } from '@mui/material';
 import ArrowBackIosNewIcon from '@mui/icons-material/ArrowBackIosNew';
 import ArrowForwardIosIcon from '@mui/icons-material/ArrowForwardIos';
+import { imageUrl } from '../utils/images';
 
 interface Prop {
   id: number;
@@ -19,7 +20,7 @@ interface Prop {
   price: number;
   print_cost: number;
   category: string;
-  images: { id: number; image_url: string; order: number }[];
+  images: { id: number; image_url: string; order: number; version?: string }[];
 }
 
 interface PropDetailModalProps {
@@ -60,7 +61,7 @@ const PropDetailModal: React.FC<PropDetailModalProps> = ({
         <Box sx={{ position: 'relative', mb: 3 }}>
           <Box
             component="img"
-            src={prop.images[currentImageIndex]?.image_url || ''}
+            src={imageUrl(prop.images[currentImageIndex], 'large.webp')}
             alt={prop.name}
             sx={{
               width: '100%',
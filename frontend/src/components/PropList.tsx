@@ -15,6 +15,7 @@ import PropDetailModal from './PropDetailModal';
 import ArrowBackIosNewIcon from '@mui/icons-material/ArrowBackIosNew';
 import ArrowForwardIosIcon from '@mui/icons-material/ArrowForwardIos';
 import { API_BASE_URL } from '../config';
+import { imageUrl } from '../utils/images';
 
 interface Prop {
   id: number;
@@ -22,7 +23,7 @@ interface Prop {
   description: string;
   price: number;
   category: string;
-  images: { id: number; image_url: string; order: number }[];
+  images: { id: number; image_url: string; order: number; version?: string }[];
 }
 
 interface PropCardProps {
@@ -65,7 +66,7 @@ const PropCard: React.FC<PropCardProps> = ({ prop, onAddToCart, onTitleClick })
         <CardMedia
           component="img"
           height="200"
-          image={prop.images[currentImageIndex]?.image_url || ''}
+          image={imageUrl(prop.images[currentImageIndex], 'thumb.webp')}
           alt={prop.name}
           sx={{ objectFit: 'cover' }}
         />
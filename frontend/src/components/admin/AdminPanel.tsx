@@ -113,9 +113,9 @@ const AdminPanel = () => {
   const handleExport = async () => {
     try {
       const response = await fetch(`${API_BASE_URL}/api/admin/export`)
-      const data = await response.json()
-      
-      const blob = new Blob([JSON.stringify(data, null, 2)], { type: 'application/json' })
+      if (!response.ok) throw new Error('Export failed')
+
+      const blob = await response.blob()
       const url = window.URL.createObjectURL(blob)
       const link = document.createElement('a')
       link.href = url
@@ -144,37 +144,27 @@ const AdminPanel = () => {
     if (!file) return
 
     try {
-      const reader = new FileReader()
-      reader.onload = async (e) => {
-        try {
-          const jsonData = JSON.parse(e.target?.result as string)
-          
-          const response = await fetch(`${API_BASE_URL}/api/admin/import`, {
-            method: 'POST',
-            headers: {
-              'Content-Type': 'application/json',
-            },
-            body: JSON.stringify(jsonData)
-          })
+      // The file is uploaded as-is and parsed on the server while it streams in
+      const response = await fetch(`${API_BASE_URL}/api/admin/import`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': file.name.endsWith('.ndjson') ? 'application/x-ndjson' : 'application/json',
+        },
+        body: file
+      })
 
-          const result = await response.json()
-          
-          if (response.ok) {
-            setMessage('Database imported successfully!')
-            // Refresh the props list
-            window.location.reload()
-          } else {
-            throw new Error(result.error || 'Import failed')
-          }
-        } catch (error) {
-          console.error('Error importing database:', error)
-          setMessage(error instanceof Error ? error.message : 'Error importing database')
-        }
+      const result = await response.json()
+
+      if (response.ok) {
+        setMessage('Database imported successfully!')
+        // Refresh the props list
+        window.location.reload()
+      } else {
+        throw new Error(result.error || 'Import failed')
       }
-      reader.readAsText(file)
     } catch (error) {
-      console.error('Error reading file:', error)
-      setMessage('Error reading file')
+      console.error('Error importing database:', error)
+      setMessage(error instanceof Error ? error.message : 'Error importing database')
     }
     
     // Clear the file input
@@ -220,7 +210,7 @@ const AdminPanel = () => {
             type="file"
             ref={fileInputRef}
             style={{ display: 'none' }}
-            accept=".json"
+            accept=".json,.ndjson"
             onChange={handleImport}
           />
         </Box>
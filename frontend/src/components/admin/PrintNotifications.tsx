@@ -9,6 +9,7 @@ import {
   TableHead,
   TableRow,
   IconButton,
+  Button,
   Box,
   Alert,
   Snackbar
@@ -25,8 +26,11 @@ interface PrintNotification {
   total_print_cost: number;
 }
 
+const PAGE_SIZE = 50;
+
 const PrintNotifications: React.FC = () => {
   const [notifications, setNotifications] = useState<PrintNotification[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [error, setError] = useState<string>('');
   const [showError, setShowError] = useState(false);
 
@@ -34,12 +38,15 @@ const PrintNotifications: React.FC = () => {
     fetchNotifications();
   }, []);
 
-  const fetchNotifications = async () => {
+  const fetchNotifications = async (cursor: string | null = null) => {
     try {
-      const response = await fetch(`${API_BASE_URL}/api/print-notifications`);
+      const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+      if (cursor) params.set('cursor', cursor);
+      const response = await fetch(`${API_BASE_URL}/api/print-notifications?${params}`);
       if (!response.ok) throw new Error('Failed to fetch notifications');
       const data = await response.json();
-      setNotifications(data);
+      setNotifications(current => cursor ? [...current, ...data] : data);
+      setNextCursor(response.headers.get('X-Next-Cursor'));
     } catch (error) {
       setError('Failed to load print notifications');
       setShowError(true);
@@ -116,6 +123,29 @@ const PrintNotifications: React.FC = () => {
         </Table>
       </TableContainer>
 
+      <Box sx={{ mt: 2, display: 'flex', justifyContent: 'space-between' }}>
+        <Box>
+          <Button href={`${API_BASE_URL}/api/print-notifications/export?format=csv`}>
+            Export CSV
+          </Button>
+          {notifications.length > 0 && (
+            // The loaded rows are the newest ones, so they are requested as a
+            // date range from the oldest loaded row on (any number of rows fit,
+            // unlike ids in the URL); notifications added since are included
+            <Button href={`${API_BASE_URL}/api/print-notifications/pdfs?${new URLSearchParams({
+              start: notifications[notifications.length - 1].order_date
+            })}`}>
+              Download PDFs
+            </Button>
+          )}
+        </Box>
+        {nextCursor && (
+          <Button variant="outlined" onClick={() => fetchNotifications(nextCursor)}>
+            Load more
+          </Button>
+        )}
+      </Box>
+
       <Snackbar
         open={showError}
         autoHideDuration={6000}
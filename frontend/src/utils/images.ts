@@ -0,0 +1,14 @@
+import { API_BASE_URL } from '../config'
+
+export interface PropImageRef {
+  id: number
+  version?: string
+}
+
+// Resized copy of a prop image from the backend image endpoint, which falls
+// back to the original image until the resized copies exist
+export const imageUrl = (image: PropImageRef | undefined, variant: string) => {
+  if (!image) return ''
+  const version = image.version ? `?v=${image.version}` : ''
+  return `${API_BASE_URL}/api/images/${image.id}/${variant}${version}`
+}